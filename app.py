@@ -1,45 +1,73 @@
 import os
+import json
+import hmac
 import cv2
-import base64
+import time
 import threading
+import atexit
 import logging
-from datetime import datetime, timedelta
-from flask import Flask, render_template, Response, request, redirect, flash, jsonify, session
+import multiprocessing
+from datetime import datetime
+from flask import Flask, render_template, Response, request, redirect, flash, jsonify, session, send_file
 import requests
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask_migrate import Migrate
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.security import generate_password_hash, check_password_hash
-from playsound import playsound
 from dotenv import load_dotenv
-from twilio.rest import Client
 
 # Load environment variables
 load_dotenv()
 
-# Logging configuration
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.FileHandler("error.log"),
-        logging.StreamHandler()
-    ]
-)
+# Logging configuration, records are written by a listener thread off the request and frame loops
+from models.config_loader import load_config
+from models.log_setup import setup_logging
+
+config = load_config()
+# Inference workers started with spawn re-import this module; they log to stderr rather than
+# run a second listener on the same files
+log_listener = None
+if multiprocessing.parent_process() is None:
+    log_listener = setup_logging(config.get('logging', {}))
+    atexit.register(log_listener.stop)
 
-# Twilio client setup 
+# Twilio client setup, created on the first SMS
 account_sid = os.getenv('TWILIO_ACCOUNT_SID')
 auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-client = Client(account_sid, auth_token)
+client = None
 
-# Import detection models
-from models.r_zone import people_detection
-from models.fire_detection import fire_detection
-from models.gear_detection import gear_detection
-from models.pose_detection import PoseEmergencyDetector
+def get_twilio_client():
+    global client
+    if client is None:
+        from twilio.rest import Client
+        client = Client(account_sid, auth_token)
+    return client
+
+# Import detection helpers, the models themselves are loaded on first use by the registry
 from models.motion_amp import amp
+from models.camera_hub import CameraHub
+from models.frame_grabber import FrameGrabber
+from models.batch_scheduler import BatchScheduler
+from models.inference_pool import InferencePool
+from models.registry import ModelRegistry
+from models.stage_graph import Stage, StageGraph
+from models.preprocess import FramePreprocessor
+from models.box_tracker import BoxTracker
+from models.motion_gate import MotionGate
+from models.zones import parse_zones
+from models.alert_writer import AlertWriter
+from models.alert_cooldown import AlertCooldown
+from models.sms_dispatcher import LocalBackend, SmsDispatcher, TwilioBackend
+from models.audio_alerts import AudioAlerter, NullBackend, PlaysoundBackend
+from models.snapshot_store import FileTooLarge, SnapshotStore, inline_type, store_root
+from models.jpeg_encoder import EncodedFrame, load_tiers, make_encoder, mjpeg_stream, sse_stream
+from models.sqlite_tuning import install_sqlite_pragmas
+from models.alert_rollup import PERIODS, bucket_range, rollup_counts
+from models.pagination import make_cursor, parse_cursor
+from models.metrics import DEFAULT_BUCKETS, Metrics
 # from models.face_auth import generate_frames
 
 # Flask app configuration
@@ -53,8 +81,15 @@ app.config["SQLALCHEMY_BINDS"] = {
 }
 app.config['UPLOAD_FOLDER'] = 'uploads'  
 ALLOWED_EXTENSIONS = {"mp4"}  
+# Complaint attachments only, the motion amplification videos of /upload_file are not capped
+MAX_UPLOAD_BYTES = config.get('complaint_max_upload_mb', 100) * 1024 * 1024
+
+# WAL and tuned pragmas on every SQLite connection, so camera writers and page readers do not block each other
+install_sqlite_pragmas(config.get('sqlite_pragmas'))
 
 db = SQLAlchemy(app)
+# Alert snapshots and complaint attachments live on disk, rows only keep their reference
+snapshot_store = SnapshotStore(store_root(config, app.instance_path))
 migrate = Migrate(app, db)
 login_manager = LoginManager(app)
 
@@ -78,14 +113,40 @@ class Camera(db.Model):
     pose_alert = db.Column(db.Boolean, default=False)
     restricted_zone = db.Column(db.Boolean, default=False)
     safety_gear_detection = db.Column(db.Boolean, default=False)
-    region = db.Column(db.Boolean, default=False)
+    region = db.Column(db.Text, nullable=True)  # JSON list of restricted zone polygons
+    motion_sensitivity = db.Column(db.Float, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_camera_user_id_Cam_id', 'user_id', 'Cam_id'),
+    )
 
 class Alert(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     date_time = db.Column(db.DateTime)
     alert_type = db.Column(db.String(50))
-    frame_snapshot = db.Column(db.LargeBinary)
+    snapshot = db.Column(db.String(80), nullable=True)  # SnapshotStore reference of the JPEG
+    Cam_id = db.Column(db.String(100), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_alert_user_id_alert_type_date_time', 'user_id', 'alert_type', 'date_time'),
+        db.Index('ix_alert_user_id_date_time_id', 'user_id', 'date_time', 'id'),
+        db.Index('ix_alert_snapshot', 'snapshot'),
+    )
+
+class AlertRollup(db.Model):
+    # Alert counts per user, camera, type and hour/day, kept up to date by write_alerts()
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    Cam_id = db.Column(db.String(100), nullable=False, default='')
+    alert_type = db.Column(db.String(50), nullable=False)
+    period = db.Column(db.String(4), nullable=False)  # 'hour' or 'day'
+    bucket = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'period', 'bucket', 'alert_type', 'Cam_id', name='uq_alert_rollup_key'),
+    )
 
 class complaint(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -94,39 +155,168 @@ class complaint(db.Model):
     email = db.Column(db.String(100))
     alert_type = db.Column(db.String(50))
     description = db.Column(db.Text)
-    file_data = db.Column(db.LargeBinary)
+    file_ref = db.Column(db.String(80), nullable=True)  # SnapshotStore reference of the attachment
+    file_name = db.Column(db.String(255), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_complaint_user_id_id', 'user_id', 'id'),
+        db.Index('ix_complaint_file_ref', 'file_ref'),
+    )
 
 
 # Initialize detection models 
-r_zone = people_detection({
-    'people_model': "models/yolov8n.pt",
-    'people_confidence': 0.45,
-    'people_region': None
-})
-fire_det = fire_detection({
-    'fire_model': "models/fire.pt",
-    'fire_confidence': 0.60
-})
-
-gear_det = gear_detection({
-    'gear_model': "models/gear.pt",
-    'gear_confidence': 0.45
-})
-
-pose_detector = PoseEmergencyDetector()
+model_config = {
+    'people': {
+        'people_model': "models/yolov8n.pt",
+        'people_confidence': 0.45,
+        'people_region': None,
+        'people_roi': config.get('people_roi', True),
+        'people_roi_margin': config.get('people_roi_margin', 32),
+        'people_zone_anchor': config.get('people_zone_anchor', 'center'),
+        'backend': config.get('backend', 'pytorch')
+    },
+    'fire': {
+        'fire_model': "models/fire.pt",
+        'fire_confidence': 0.60,
+        'backend': config.get('backend', 'pytorch')
+    },
+    'gear': {
+        'gear_model': "models/gear.pt",
+        'gear_confidence': 0.45,
+        'backend': config.get('backend', 'pytorch')
+    }
+}
+# Detectors are built the first time a camera needs them, see prewarm_models()
+model_registry = ModelRegistry(model_config)
+detector_locks = {name: threading.Lock() for name in model_config}
+
+# Label and BGR colour of the boxes drawn for each detector
+BOX_OVERLAYS = {
+    "restricted_zone": ("Restricted Zone Violation", (255, 0, 0)),
+    "fire": ("Fire Detected", (0, 0, 255)),
+    "gear": ("Gear Detected", (0, 255, 0))
+}
+
+# Run each detector on every Nth frame only
+detection_cadence = {
+    name: max(1, int(config.get('detection_cadence', {}).get(name, 1)))
+    for name in ("pose", "restricted_zone", "fire", "gear")
+}
+
+# Motion gate in front of the detectors, per-camera sensitivity overrides the default
+motion_config = config.get('motion_gate', {})
+motion_gates = {}
+
+# Build each frame's model input once and share it between the YOLO models
+shared_preprocessing = config.get('shared_preprocessing', True)
+
+# Per-camera, per-stage latency histograms and frame counters, served on /metrics
+metrics_config = config.get('metrics', {})
+metrics = Metrics(buckets=metrics_config.get('buckets') or DEFAULT_BUCKETS, enabled=metrics_config.get('enabled', True))
+
+# Detection stages of a frame run concurrently on this pool, shared by all cameras
+stage_graph = StageGraph(max_workers=config.get('stage_workers', 8))
+# A camera gives up on a frame handed to a batch scheduler or the inference pool after this long
+detector_timeout = config.get('detector_timeout', 10)
+
+# Optional worker processes for inference, frames are passed through shared memory.
+# The pool starts with the first frame, so neither the reloader's watcher process nor
+# spawned workers re-importing this module start one of their own
+pool_config = config.get('inference_pool', {})
+use_inference_pool = pool_config.get('workers', 0) > 0
+inference_pool = None
+inference_pool_lock = threading.Lock()
+
+def get_inference_pool():
+    """
+    The inference pool, started on the first call and closed when the app exits.
+    """
+    global inference_pool
+    if inference_pool is None:
+        with inference_pool_lock:
+            if inference_pool is None:
+                pool = InferencePool(pool_config['workers'], model_config, slots=pool_config.get('slots'),
+                                     start_method=pool_config.get('start_method'))
+                atexit.register(pool.close)
+                metrics.watch('inference_pool', pool.stats)
+                inference_pool = pool
+    return inference_pool
+
+# Annotated frames are JPEG-encoded once per quality tier, on demand, and shared by the viewers
+jpeg_config = config.get('jpeg', {})
+jpeg_encoder = make_encoder(jpeg_config.get('encoder', 'opencv'))
+jpeg_tiers = load_tiers(jpeg_config.get('tiers'))
+
+# Alerts are queued by the frame loops and committed in batches by a background writer
+alert_writer_config = config.get('alert_writer', {})
+alert_writer = AlertWriter(
+    lambda alerts: write_alerts(alerts),
+    max_queue=alert_writer_config.get('max_queue', 256),
+    max_batch=alert_writer_config.get('max_batch', 32),
+    max_wait=alert_writer_config.get('max_wait_ms', 500) / 1000.0
+)
+atexit.register(alert_writer.stop)
+
+# Alerts of the same user, camera and type within the cooldown are dropped before reaching the queue.
+# Seeded by start_prewarm() when the app starts serving, or else on the first alert, so that
+# importing the app (e.g. flask db upgrade) never queries the database
+alert_cooldown = AlertCooldown(
+    config.get('alert_cooldown_seconds', 60),
+    seed_fn=lambda: latest_alerts()
+)
+
+# Alert SMS are sent from a background dispatcher that coalesces bursts and rate-limits each recipient
+sms_config = config.get('sms', {})
+if sms_config.get('backend', 'twilio') == 'local':
+    sms_backend = LocalBackend(sms_config.get('local_outbox'))
+else:
+    sms_backend = TwilioBackend(get_twilio_client, os.getenv('TWILIO_PHONE_NUMBER'))
+sms_dispatcher = SmsDispatcher(
+    sms_backend,
+    sms_config.get('recipients') or [os.getenv('ADMIN_PHONE_NUMBER')],
+    window=sms_config.get('window', 30),
+    rate_limit=sms_config.get('rate_limit', 300),
+    max_retries=sms_config.get('max_retries', 3),
+    backoff=sms_config.get('backoff', 2)
+)
+atexit.register(sms_dispatcher.stop)
+
+# One audio worker plays every alert sound, none on headless servers
+audio_config = config.get('audio', {})
+if audio_config.get('backend', 'playsound') == 'none':
+    audio_backend = NullBackend()
+else:
+    audio_backend = PlaysoundBackend(audio_config.get('sound') or os.path.join('static', 'sounds', 'alert.mp3'))
+audio_alerter = AudioAlerter(
+    audio_backend,
+    cooldown=audio_config.get('cooldown', 10),
+    repeat=audio_config.get('repeat', 3),
+    priorities=audio_config.get('priorities', {'fire': 0, 'pose': 1})
+)
+atexit.register(audio_alerter.stop)
+
+# One capture-and-detect worker per camera, shared by all of its viewers
+camera_hub = CameraHub(idle_timeout=config.get('camera_idle_timeout', 10))
+
+# Queue depths and counters of the background workers, reported with the stage metrics
+metrics.watch('alert_writer', alert_writer.stats)
+metrics.watch('alert_cooldown', alert_cooldown.stats)
+metrics.watch('sms', sms_dispatcher.stats)
+metrics.watch('audio', audio_alerter.stats)
+
+def camera_hub_stats():
+    viewers = camera_hub.stats()
+    return {'streams': len(viewers), 'viewers': sum(viewers.values())}
+
+metrics.watch('camera_hub', camera_hub_stats)
 
 # Helper function to check file extensions
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Play alert sound
-def play_alert_sound():
-    try:
-        for _ in range(3):
-            playsound(os.path.join('static', 'sounds', 'alert.mp3'))
-        logging.info("Alert sound played successfully.")
-    except Exception as e:
-        logging.error(f"Error playing alert sound: {str(e)}")
+# Play alert sound, queued for the audio worker so callers never block
+def play_alert_sound(alert):
+    audio_alerter.play(alert)
 
 # Routes
 @app.route('/')
@@ -227,23 +417,41 @@ def upload_file():
         logging.warning("File upload attempted with wrong format.")
         return redirect("/upload")
 
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    logging.warning(f"Request to {request.path} refused, body too large.")
+    return "The uploaded file is too large.", 413
+
 @app.route('/<int:id>/submit_complaint_submited', methods=['GET', 'POST'])
 def submit_complaint_submited(id):
     if request.method == 'POST':
+        # Refused before the form is parsed, 64 KB is left for the form fields; chunked
+        # bodies have no length and are stopped by put_stream's max_size instead
+        if (request.content_length or 0) > MAX_UPLOAD_BYTES + 64 * 1024:
+            raise RequestEntityTooLarge()
         full_name = request.form['fullName']
         email = request.form['email']
         alert_type = request.form['alertType']
         description = request.form['description']
-        file_data = request.files['file'].read() if 'file' in request.files else None
+        upload = request.files.get('file')
+        file_ref, file_name = None, None
 
         try:
+            if upload and upload.filename:
+                # Copied to the store chunk by chunk, the attachment is never held in memory
+                file_name = secure_filename(upload.filename)
+                # Only displayable types keep their extension, the rest are stored as plain bytes
+                ext = os.path.splitext(file_name)[1] if inline_type(file_name) else ''
+                file_ref = snapshot_store.put_stream(upload.stream, ext, max_size=MAX_UPLOAD_BYTES)
             complaint_submited = complaint(full_name=full_name, email=email, alert_type=alert_type, description=description,
-                                  file_data=file_data, user_id=id)
+                                  file_ref=file_ref, file_name=file_name, user_id=id)
             db.session.add(complaint_submited)
             db.session.commit()
             logging.info(f"complaint submitted successfully by user ID {id}.")
             flash("Your complaint_submited has been recorded. We'll get back to you soon.")
             return redirect(f'/complaint/{id}')
+        except FileTooLarge:
+            return request_too_large(None)
         except Exception as e:
             logging.error(f"Error submitting complaint_submited for user ID {id}: {str(e)}")
             flash("Error recording complaint_submited.")
@@ -253,7 +461,7 @@ def submit_complaint_submited(id):
 def fire_detected():
     try:
         send_alert_message()
-        threading.Thread(target=play_alert_sound).start()
+        play_alert_sound("fire")
         logging.info("Fire alert triggered.")
         return jsonify({"message": "Fire alert triggered successfully!"}), 200
     except Exception as e:
@@ -261,15 +469,8 @@ def fire_detected():
         return jsonify({"error": str(e)}), 500
 
 def send_alert_message():
-    try:
-        message = client.messages.create(
-            body="Fire detected! Please take immediate action.",
-            from_=os.getenv('TWILIO_PHONE_NUMBER'),
-            to=os.getenv('ADMIN_PHONE_NUMBER')
-        )
-        logging.info(f"SMS sent successfully. Message SID: {message.sid}")
-    except Exception as e:
-        logging.error(f"Error sending SMS: {str(e)}")
+    # Queued for the SMS dispatcher, the request never waits for Twilio
+    sms_dispatcher.notify("fire", "Fire detected! Please take immediate action.")
 
 @app.route('/dashboard')
 @login_required
@@ -292,6 +493,25 @@ def getting_cam_details():
     pose_bool = "pose_alert" in request.form
     r_bool = "R_zone" in request.form
     s_gear_bool = "Safety_gear" in request.form
+    # Entered as a percentage of changed pixels, blank keeps the configured default
+    sensitivity = request.form.get('motion_sensitivity', '').strip()
+    try:
+        motion_sensitivity = float(sensitivity) / 100 if sensitivity else None
+    except ValueError:
+        motion_sensitivity = None
+    # Restricted zones as a JSON list of polygons, e.g. [[[x, y], [x, y], [x, y]], ...]
+    # A blank field keeps the camera's zones (zones None), clear_zones removes them
+    zones, region = None, None
+    region_text = request.form.get('region', '').strip()
+    if "clear_zones" in request.form:
+        zones = []
+    elif region_text:
+        try:
+            zones = parse_zones(region_text)
+            region = json.dumps([polygon.tolist() for polygon in zones]) if zones else None
+        except (ValueError, TypeError):
+            flash('Invalid restricted zone polygons, zones left unchanged.')
+            zones, region = None, None
 
     try:
         camera = Camera.query.filter_by(Cam_id=camid, user_id=current_user.id).first()
@@ -300,11 +520,17 @@ def getting_cam_details():
             camera.pose_alert = pose_bool
             camera.restricted_zone = r_bool
             camera.safety_gear_detection = s_gear_bool
+            camera.motion_sensitivity = motion_sensitivity
+            if zones is not None:
+                camera.region = region
         else:
             camera = Camera(user_id=current_user.id, Cam_id=camid, fire_detection=fire_bool,
-                            pose_alert=pose_bool, restricted_zone=r_bool, safety_gear_detection=s_gear_bool)
+                            pose_alert=pose_bool, restricted_zone=r_bool, safety_gear_detection=s_gear_bool,
+                            motion_sensitivity=motion_sensitivity, region=region)
         db.session.add(camera)
         db.session.commit()
+        # Restart the running worker so viewers pick up the new flags
+        camera_hub.stop((current_user.id, str(camid)))
         logging.info(f"Camera details updated for user ID {current_user.id}.")
     except Exception as e:
         logging.error(f"Error updating camera details for user ID {current_user.id}: {str(e)}")
@@ -314,12 +540,21 @@ def getting_cam_details():
 @login_required
 def notifications():
     try:
-        alerts = Alert.query.filter_by(user_id=current_user.id).order_by(Alert.date_time.desc()).all()
-        for alert in alerts:
-            if alert.frame_snapshot:
-                alert.frame_snapshot = base64.b64encode(alert.frame_snapshot).decode('utf-8')
+        # Keyset pagination: ?before=<date_time>_<id> of the last alert of the previous page
+        query = Alert.query.filter_by(user_id=current_user.id)
+        before = parse_cursor(request.args.get('before'))
+        if before:
+            date_time, alert_id = before
+            query = query.filter(db.or_(Alert.date_time < date_time,
+                                        db.and_(Alert.date_time == date_time, Alert.id < alert_id)))
+        page_size = config.get('notifications_page_size', 25)
+        alerts = query.order_by(Alert.date_time.desc(), Alert.id.desc()).limit(page_size + 1).all()
+        next_cursor = None
+        if len(alerts) > page_size:
+            alerts = alerts[:page_size]
+            next_cursor = make_cursor(alerts[-1].date_time, alerts[-1].id)
         logging.info(f"Notifications accessed by user {current_user.username}.")
-        return render_template('notifications.html', alerts=alerts)
+        return render_template('notifications.html', alerts=alerts, next_cursor=next_cursor, paged=bool(before))
     except Exception as e:
         logging.error(f"Error loading notifications: {str(e)}")
         flash("Error loading notifications.")
@@ -329,12 +564,33 @@ def notifications():
 @app.route('/complaints')
 @login_required
 def complaint_page():
-    complaints = complaint.query.filter_by(user_id=current_user.id).all()
-    for complaint_submited in complaints:
-        if complaint_submited.file_data:
-            complaint_submited.file_data = base64.b64encode(complaint_submited.file_data).decode('utf-8')
+    # Keyset pagination on id, newest first: ?before=<id of the last complaint shown>
+    query = complaint.query.filter_by(user_id=current_user.id)
+    before = request.args.get('before', type=int)
+    if before:
+        query = query.filter(complaint.id < before)
+    page_size = config.get('complaints_page_size', 25)
+    complaints = query.order_by(complaint.id.desc()).limit(page_size + 1).all()
+    next_cursor = None
+    if len(complaints) > page_size:
+        complaints = complaints[:page_size]
+        next_cursor = complaints[-1].id
     logging.info(f"Complaints accessed by user {current_user.username}.")
-    return render_template('complaints.html', complaints=complaints, user=current_user)
+    return render_template('complaints.html', complaints=complaints, user=current_user,
+                           next_cursor=next_cursor, paged=bool(before))
+
+@app.route('/complaints/<int:id>/file')
+@login_required
+def complaint_file(id):
+    """
+    Download a complaint attachment. Range requests are honoured, so large
+    evidence videos can be seeked and resumed without loading them whole.
+    """
+    complaint_submited = complaint.query.filter_by(id=id, user_id=current_user.id).first()
+    if not complaint_submited or not complaint_submited.file_ref or not snapshot_store.exists(complaint_submited.file_ref):
+        return "File not found.", 404
+    return send_stored(complaint_submited.file_ref, download_name=complaint_submited.file_name,
+                       as_attachment=request.args.get('download') == '1')
 
 
 @app.route('/complaint/<int:id>')
@@ -343,6 +599,64 @@ def complaint_form(id):
     logging.info(f"complaint form accessed for user ID {id}.")
     return render_template("complaint_form.html", username=user.username, id=user.id)
 
+def send_stored(ref, download_name=None, as_attachment=False):
+    """
+    Send a file of the store. Uploads are user-controlled, so only allowlisted
+    types are shown inline, as their fixed mimetype; anything else is a download.
+    """
+    mimetype = inline_type(ref)
+    if mimetype is None:
+        mimetype, as_attachment = 'application/octet-stream', True
+    response = send_file(snapshot_store.path(ref), mimetype=mimetype, conditional=True,
+                         download_name=download_name or ref, as_attachment=as_attachment, max_age=31536000)
+    # Files never change once stored, so browsers may cache them for good
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+def release_snapshot(ref):
+    """
+    Remove a stored file once no alert or complaint refers to it any more.
+    """
+    if ref and not Alert.query.filter_by(snapshot=ref).first() and not complaint.query.filter_by(file_ref=ref).first():
+        snapshot_store.delete(ref)
+
+@app.route('/snapshots/<string:ref>')
+@login_required
+def snapshot(ref):
+    """
+    Serve a stored snapshot or attachment of the current user. Files never change
+    once stored, so browsers may cache them for good.
+    """
+    owned = Alert.query.filter_by(snapshot=ref, user_id=current_user.id).first() or \
+        complaint.query.filter_by(file_ref=ref, user_id=current_user.id).first()
+    if not owned or not snapshot_store.exists(ref):
+        return "Snapshot not found.", 404
+    return send_stored(ref)
+
+@app.route('/snapshots/<string:ref>/thumb')
+@login_required
+def snapshot_thumb(ref):
+    """
+    Serve a small JPEG thumbnail of a stored snapshot, with an ETag so that
+    browsers revalidate it with a 304 instead of downloading it again.
+    """
+    owned = Alert.query.filter_by(snapshot=ref, user_id=current_user.id).first() or \
+        complaint.query.filter_by(file_ref=ref, user_id=current_user.id).first()
+    if not owned or not snapshot_store.exists(ref):
+        return "Snapshot not found.", 404
+    width = config.get('thumbnail_width', 240)
+    try:
+        path = snapshot_store.thumbnail(ref, width)
+    except ValueError:
+        return "Snapshot has no thumbnail.", 404
+    # Snapshots never change, the reference and width identify the thumbnail
+    response = send_file(path, mimetype='image/jpeg', conditional=True,
+                         etag=f"{os.path.splitext(ref)[0]}-w{width}", max_age=31536000)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
 @app.route('/delete/<int:id>')
 @login_required
 def delete(id):
@@ -351,6 +665,7 @@ def delete(id):
         if complaint_submited:
             db.session.delete(complaint_submited)
             db.session.commit()
+            release_snapshot(complaint_submited.file_ref)
             flash('complaint deleted successfully!', 'success')
             logging.info(f"complaint with ID {id} deleted by user {current_user.username}.")
         else:
@@ -369,6 +684,7 @@ def delete_notification(id):
         if alert:
             db.session.delete(alert)
             db.session.commit()
+            release_snapshot(alert.snapshot)
             flash('Notification deleted successfully!', 'success')
             logging.info(f"Notification with ID {id} deleted by user {current_user.username}.")
         else:
@@ -387,6 +703,7 @@ def delete_camera(id):
         if camera:
             db.session.delete(camera)
             db.session.commit()
+            camera_hub.stop((current_user.id, str(camera.Cam_id)))
             flash('Camera deleted successfully!', 'success')
             logging.info(f"Camera with ID {id} deleted by user {current_user.username}.")
         else:
@@ -405,6 +722,62 @@ def delete_camera(id):
 def analytics():
     return render_template('analytics.html')
 
+def rollup_query(period, buckets):
+    """
+    Rollup rows of the current user for the last `buckets` hours or days.
+    """
+    if period not in PERIODS:
+        period = 'day'
+    start = bucket_range(datetime.now(), period, buckets)[0]
+    query = db.session.query(AlertRollup).filter(AlertRollup.user_id == current_user.id,
+                                                 AlertRollup.period == period,
+                                                 AlertRollup.bucket >= start)
+    camera = request.args.get('camera')
+    if camera:
+        query = query.filter(AlertRollup.Cam_id == camera)
+    alert_type = request.args.get('alert_type')
+    if alert_type:
+        query = query.filter(AlertRollup.alert_type == alert_type)
+    return period, query
+
+@app.route('/analytics/timeseries')
+@login_required
+def analytics_timeseries():
+    """
+    Alert counts per bucket and alert type, ?period=hour|day&buckets=N[&camera=&alert_type=].
+    Buckets without alerts are returned as zeros.
+    """
+    period = request.args.get('period', 'day')
+    buckets = min(max(request.args.get('buckets', 30, type=int), 1), 24 * 90)
+    period, query = rollup_query(period, buckets)
+    rows = query.with_entities(AlertRollup.bucket, AlertRollup.alert_type, db.func.sum(AlertRollup.count)) \
+        .group_by(AlertRollup.bucket, AlertRollup.alert_type).all()
+    labels = bucket_range(datetime.now(), period, buckets)
+    index = {bucket: i for i, bucket in enumerate(labels)}
+    series = {}
+    for bucket, alert_type, count in rows:
+        if bucket in index:
+            series.setdefault(alert_type, [0] * len(labels))[index[bucket]] = int(count)
+    return jsonify({
+        'period': period,
+        'buckets': [bucket.isoformat() for bucket in labels],
+        'series': series
+    })
+
+@app.route('/analytics/top')
+@login_required
+def analytics_top():
+    """
+    Top cameras or alert types by alert count, ?by=camera|alert_type&days=N&limit=N.
+    """
+    column = AlertRollup.Cam_id if request.args.get('by') == 'camera' else AlertRollup.alert_type
+    days = min(max(request.args.get('days', 30, type=int), 1), 3650)
+    limit = min(max(request.args.get('limit', 5, type=int), 1), 100)
+    _, query = rollup_query('day', days)
+    total = db.func.sum(AlertRollup.count)
+    rows = query.with_entities(column, total).group_by(column).order_by(total.desc()).limit(limit).all()
+    return jsonify([{'key': key or 'unknown', 'count': int(count)} for key, count in rows])
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -415,29 +788,140 @@ def logout():
         logging.error(f"Error during logout: {str(e)}")
     return redirect('/')
 
+def camera_source(camera):
+    """
+    The hub key of the camera and the function starting its worker.
+    """
+    flag_r_zone = camera.restricted_zone
+    flag_pose_alert = camera.pose_alert
+    flag_fire = camera.fire_detection
+    flag_gear = camera.safety_gear_detection
+    region = camera.region
+    motion_sensitivity = camera.motion_sensitivity
+    user_id = camera.user_id
+    Cam_id = str(camera.Cam_id)
+    return (user_id, Cam_id), lambda: process_frames(Cam_id, region, flag_r_zone, flag_pose_alert,
+                                                     flag_fire, flag_gear, user_id, motion_sensitivity)
+
+def subscribe_camera(camera):
+    """
+    Attach a viewer to the camera's shared worker, starting it if needed.
+    """
+    return camera_hub.subscribe(*camera_source(camera))
+
 @app.route('/video_feed/<string:Cam_id>')
 @login_required
 def video_feed(Cam_id):
     camera = Camera.query.filter_by(Cam_id=str(Cam_id), user_id=current_user.id).first()
     if camera:
-        flag_r_zone = camera.restricted_zone
-        flag_pose_alert = camera.pose_alert
-        flag_fire = camera.fire_detection
-        flag_gear = camera.safety_gear_detection
-        region = camera.region
+        # Quality tier of the stream, e.g. ?tier=thumb for the dashboard grid
+        tier = request.args.get('tier', 'full')
+        # ?overlay=0 gives the clean video, for clients drawing /detections themselves
+        overlay = request.args.get('overlay', '1') != '0'
 
         try:
             logging.info(f"Video feed accessed for camera ID {Cam_id} by user {current_user.username}.")
-            return Response(process_frames(str(Cam_id), region, flag_r_zone, flag_pose_alert,
-                                           flag_fire, flag_gear, current_user.id),
-                            mimetype='multipart/x-mixed-replace; boundary=frame')
+            frames = subscribe_camera(camera)
+            return Response(mjpeg_stream(frames, tier, overlay), mimetype='multipart/x-mixed-replace; boundary=frame')
         except Exception as e:
             logging.error(f"Error accessing video feed for camera ID {Cam_id}: {str(e)}")
             return f"Error occurred: {str(e)}"
     else:
         logging.warning(f"Camera ID {Cam_id} not found for user {current_user.username}.")
         return "Camera details not found."
+
+@app.route('/detections/<string:Cam_id>')
+@login_required
+def detections_feed(Cam_id):
+    """
+    Server-sent events with the detections of every processed frame:
+    boxes, classes, confidences, track ids and the frame sequence number.
+    """
+    camera = Camera.query.filter_by(Cam_id=str(Cam_id), user_id=current_user.id).first()
+    if camera:
+        try:
+            logging.info(f"Detection stream accessed for camera ID {Cam_id} by user {current_user.username}.")
+            events = subscribe_camera(camera)
+            return Response(sse_stream(events), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        except Exception as e:
+            logging.error(f"Error accessing detection stream for camera ID {Cam_id}: {str(e)}")
+            return jsonify({"error": str(e)}), 500
+    else:
+        logging.warning(f"Camera ID {Cam_id} not found for user {current_user.username}.")
+        return jsonify({"error": "Camera details not found."}), 404
+
+@app.route('/detections')
+@login_required
+def all_detections_feed():
+    """
+    Server-sent events with the detections of several cameras of the user over
+    one connection, each event naming its camera. Browsers allow only six
+    connections per host, which per-camera streams next to the video feeds use up.
+    ?cams=1,3 limits the stream to those cameras, e.g. the tiles on screen, so the
+    workers of the others can stop once idle; without it every camera is streamed.
+    """
+    cameras = Camera.query.filter_by(user_id=current_user.id).all()
+    if 'cams' in request.args:
+        wanted = {cam_id.strip() for cam_id in request.args['cams'].split(',')}
+        cameras = [camera for camera in cameras if str(camera.Cam_id) in wanted]
+    if not cameras:
+        return jsonify({"error": "No cameras to stream."}), 404
+    try:
+        logging.info(f"Detection stream of {len(cameras)} cameras accessed by user {current_user.username}.")
+        events = camera_hub.subscribe_many([camera_source(camera) for camera in cameras])
+        return Response(sse_stream(events), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    except Exception as e:
+        logging.error(f"Error accessing the detection stream: {str(e)}")
+        return jsonify({"error": str(e)}), 500
     
+@app.route('/motion_stats')
+@login_required
+def motion_stats():
+    stats = {camid: gate.stats() for (user_id, camid), gate in list(motion_gates.items())
+             if user_id == current_user.id}
+    return jsonify(stats)
+
+@app.route('/alert_stats')
+def alert_stats():
+    # The alert queues are shared by every user, only metrics token holders see them
+    allowed, user_id = metrics_scope()
+    if not allowed:
+        return jsonify({"error": "Unauthorized"}), 401
+    if user_id is not None:
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(dict(alert_writer.stats(), cooldown=alert_cooldown.stats(), sms=sms_dispatcher.stats(),
+                           audio=audio_alerter.stats()))
+
+def metrics_scope():
+    """
+    Whose cameras the caller may see on /metrics: all of them and the
+    process-wide components with the bearer token of metrics.token (or
+    METRICS_TOKEN), only a logged-in user's own cameras otherwise.
+    Returns (allowed, user_id).
+    """
+    token = metrics_config.get('token') or os.getenv('METRICS_TOKEN')
+    if token and hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return True, None
+    if current_user.is_authenticated:
+        return True, current_user.id
+    return False, None
+
+@app.route('/metrics')
+def metrics_text():
+    allowed, user_id = metrics_scope()
+    if not allowed:
+        return Response("Unauthorized\n", status=401, mimetype='text/plain')
+    return Response(metrics.prometheus(user_id), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/metrics/summary')
+def metrics_summary():
+    allowed, user_id = metrics_scope()
+    if not allowed:
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(metrics.summary(user_id))
+
 #-----------CHATBOT-----------------
 API_KEY = os.getenv("GEMINI_API_KEY")
 
@@ -522,28 +1006,218 @@ def about():
 
 
 # ML processing functions
-def add_to_db(results, frame, alert_name, user_id=None):
+def run_detector(name, frame, region=None, preprocessor=None, wait=True, key=None):
+    """
+    Run one YOLO detector on a frame, in the inference pool when it is enabled,
+    otherwise through its batch scheduler when batching is enabled.
+    The frame's FramePreprocessor, if given, supplies the shared input tensor.
+    key is the (user_id, Cam_id) of the camera, which the detector keeps its
+    track ids under.
+    With wait=False, a frame handed to the pool or a batch scheduler gives a
+    Future instead of blocking until the result is in.
+    """
+    if use_inference_pool:
+        if not wait:
+            return get_inference_pool().submit(name, frame, key=key, region=region)
+        return get_inference_pool().run(name, frame, key=key, timeout=detector_timeout, region=region)
+    detector = model_registry.get(name)
+    prepared = None
+    # With a zone crop the person model gets its own input, the full-frame tensor would be thrown away
+    if preprocessor is not None and not (name == 'people' and detector.will_crop(frame, region)):
+        prepared = preprocessor.get(detector.imgsz, detector.rect)
+    if name in batchers:
+        future = batchers[name].submit((frame, region, prepared, key))
+        return future.result(detector_timeout) if wait else future
+    # Cameras share the model instances, which are not safe to call concurrently
+    with detector_locks[name]:
+        if name == 'people':
+            return detector.process(frame, region=region, prepared=prepared, key=key)
+        return detector.process(frame, prepared=prepared, key=key)
+
+def detector_stage(stage_name, name, frame, region=None, preprocessor=None, key=None):
+    """
+    Detection stage of one YOLO detector. Frames for the inference pool or a
+    batch scheduler are only queued by the camera thread, so waiting for their
+    results holds no stage_graph thread and does not cap the batch size.
+    """
+    handed_off = use_inference_pool or name in batchers
+    return Stage(stage_name, lambda: run_detector(name, frame, region, preprocessor, wait=not handed_off, key=key),
+                 inline=handed_off, timeout=detector_timeout)
+
+def run_batch(name):
+    """
+    Build the batch function of a BatchScheduler for detector name.
+    Items are (frame, region, prepared, camera key) tuples.
+    """
+    def run(items):
+        frames, regions, prepared, keys = (list(values) for values in zip(*items))
+        if not all(prepared):
+            prepared = None
+        detector = model_registry.get(name)
+        if name == 'people':
+            return detector.process_batch(frames, regions, prepared, keys)
+        return detector.process_batch(frames, prepared, keys)
+    return run
+
+# Cross-camera batching: frames from every active camera share one forward pass per model
+batch_config = config.get('batching', {})
+batchers = {}
+if batch_config.get('enabled', False) and not use_inference_pool:
+    batch_args = {
+        'max_batch': batch_config.get('max_batch', 16),
+        'max_wait': batch_config.get('max_wait_ms', 20) / 1000.0,
+        'timeout': detector_timeout
+    }
+    batchers = {name: BatchScheduler(run_batch(name), name, **batch_args) for name in model_config}
+    metrics.watch('batcher', lambda: {name: batcher.stats() for name, batcher in batchers.items()})
+
+def prewarm_models():
+    """
+    Load, in the background, the detectors that the configured cameras use,
+    so the first viewer does not wait for them.
+    """
+    if use_inference_pool:
+        return None
+    with app.app_context():
+        cameras = Camera.query.all()
+    names = set()
+    for camera in cameras:
+        if camera.restricted_zone:
+            names.add('people')
+        if camera.fire_detection:
+            names.add('fire')
+        if camera.safety_gear_detection:
+            names.add('gear')
+    logging.info(f"Pre-warming models: {sorted(names)}")
+    return model_registry.prewarm(sorted(names))
+
+prewarm_started = False
+prewarm_lock = threading.Lock()
+
+def start_prewarm():
+    """
+    Pre-warm the models and seed the alert cooldown, once per serving process.
+    """
+    global prewarm_started
+    with prewarm_lock:
+        if prewarm_started:
+            return
+        prewarm_started = True
+    if config.get('prewarm_models', True):
+        prewarm_models()
+    alert_cooldown.seed()
+
+# Under gunicorn, waitress or flask run this module is imported without running __main__,
+# so the first request starts the pre-warm; the reloader's watcher process never gets one
+@app.before_request
+def prewarm_on_first_request():
+    if not prewarm_started:
+        start_prewarm()
+
+def detect_pose(pose, frame, key):
+    """
+    Return True when the emergency pose has been held long enough on this camera.
+    """
+    if use_inference_pool:
+        return get_inference_pool().run('pose', frame, key=key)
+    return pose.detect_pose(frame)[0]
+
+def draw_detections(frame, event):
+    """
+    Draw the boxes, labels, pose alert and active processes of a detection event on frame.
+    """
+    if event.get('alert'):
+        from models.pose_detection import PoseEmergencyDetector
+        PoseEmergencyDetector.draw_alert(frame)
+    for detection in event['detections']:
+        label, colour = BOX_OVERLAYS[detection['type']]
+        x1, y1, x2, y2 = detection['box']
+        cv2.rectangle(frame, (x1, y1), (x2, y2), colour, 2)
+        cv2.putText(frame, label, (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, colour, 2)
+
+    # Overlay active process text
+    overlay_text = " + ".join(event['processes'])
+    cv2.putText(frame, overlay_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    return frame
+
+def add_to_db(results, frame, alert_name, user_id=None, camid=None):
     if isinstance(results[0], bool) and results[0]:
+        # Cooldown per user, camera and alert type is checked in memory, without a query
+        now = datetime.now()
+        key = (user_id, camid, alert_name)
+        if not alert_cooldown.allow(key, now):
+            return
+
         for box in results[1]:
             x1, y1, x2, y2 = box
             cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
 
-        with app.app_context():
-            latest_alert = Alert.query.filter_by(alert_type=alert_name, user_id=user_id).order_by(Alert.date_time.desc()).first()
-            if (latest_alert is None) or ((datetime.now() - latest_alert.date_time) > timedelta(minutes=1)):
-                new_alert = Alert(
-                    date_time=datetime.now(),
-                    alert_type=alert_name,
-                    frame_snapshot=cv2.imencode('.jpg', frame)[1].tobytes(),
-                    user_id=user_id
+        # Written by the background alert writer, the frame loop never waits for the database
+        queued = alert_writer.submit({
+            'date_time': now,
+            'alert_type': alert_name,
+            'frame': frame,
+            'user_id': user_id,
+            'Cam_id': camid
+        })
+        if not queued:
+            alert_cooldown.release(key, now)
+
+def write_alerts(alerts):
+    """
+    Commit a batch of queued alerts, already deduplicated by the alert cooldown.
+    """
+    # Snapshots this batch added to the store, removed again if the batch is not committed
+    created = []
+    with app.app_context(), metrics.timer('db'):
+        try:
+            for alert in alerts:
+                data = cv2.imencode('.jpg', alert['frame'])[1].tobytes()
+                ref = snapshot_store.ref_of(data)
+                if not snapshot_store.exists(ref):
+                    created.append(ref)
+                db.session.add(Alert(
+                    date_time=alert['date_time'],
+                    alert_type=alert['alert_type'],
+                    snapshot=snapshot_store.put(data),
+                    user_id=alert['user_id'],
+                    Cam_id=alert['Cam_id']
+                ))
+                logging.info(f"Added alert of type {alert['alert_type']} for user ID {alert['user_id']}.")
+            # The rollups are updated in the same transaction as the alerts they count
+            for (user_id, Cam_id, alert_type, period, bucket), count in rollup_counts(alerts).items():
+                db.session.execute(
+                    sqlite_insert(AlertRollup)
+                    .values(user_id=user_id, Cam_id=Cam_id, alert_type=alert_type, period=period, bucket=bucket, count=count)
+                    .on_conflict_do_update(index_elements=['user_id', 'period', 'bucket', 'alert_type', 'Cam_id'],
+                                           set_={'count': AlertRollup.count + count})
                 )
-                db.session.add(new_alert)
-                db.session.commit()
-                logging.info(f"Added alert of type {alert_name} for user ID {user_id}.")
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for ref in created:
+                try:
+                    release_snapshot(ref)
+                except Exception as e:
+                    logging.error(f"Removing snapshot {ref} of an uncommitted alert failed: {e}")
+            raise
+
+def latest_alerts():
+    """
+    Time of the latest alert per (user, camera, alert type), seeds the alert cooldown.
+    """
+    with app.app_context():
+        rows = db.session.query(Alert.user_id, Alert.Cam_id, Alert.alert_type, db.func.max(Alert.date_time)) \
+            .group_by(Alert.user_id, Alert.Cam_id, Alert.alert_type).all()
+    return [((user_id, Cam_id, alert_type), date_time) for user_id, Cam_id, alert_type, date_time in rows]
 
-def process_frames(camid, region, flag_r_zone=False, flag_pose_alert=False, flag_fire=False, flag_gear=False, user_id=None):
+def process_frames(camid, region, flag_r_zone=False, flag_pose_alert=False, flag_fire=False, flag_gear=False, user_id=None,
+                   motion_sensitivity=None):
     """
     Process video frames and apply detection logic.
+    Runs inside the camera's CameraStream worker, not per viewer, and yields
+    an EncodedFrame per processed frame.
     """
     # Use numeric camera index if camid is digit, else assume URL
     if camid.isdigit():
@@ -557,83 +1231,140 @@ def process_frames(camid, region, flag_r_zone=False, flag_pose_alert=False, flag
         "fire": [],
         "gear": []
     }
+    # Confidence, class and track id of each persistent box
+    persistent_details = {name: [] for name in persistent_boxes}
+
+    # Mediapipe graphs are not thread-safe, so each camera gets its own pose detector
+    if flag_pose_alert:
+        from models.pose_detection import PoseEmergencyDetector
+    pose = PoseEmergencyDetector() if flag_pose_alert and not use_inference_pool else None
+
+    def alert_callback(alert):
+        play_alert_sound("pose")
+        add_to_db((True, [alert['bbox']]), alert['frame'], "Emergency Pose Detected", user_id, camid)
+
+    # Detectors run every N frames (detection_cadence), optical flow moves their boxes in between
+    tracker = BoxTracker() if any(every > 1 for every in detection_cadence.values()) else None
+    frame_index = 0
+
+    # Skip inference while the scene is static, with a forced check every max_interval seconds
+    gate = None
+    if motion_config.get('enabled', False):
+        gate = MotionGate(
+            sensitivity=motion_sensitivity if motion_sensitivity is not None else motion_config.get('sensitivity', 0.01),
+            pixel_threshold=motion_config.get('pixel_threshold', 25),
+            max_interval=motion_config.get('max_interval', 5)
+        )
+        motion_gates[(user_id, camid)] = gate
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            logging.warning(f"No frames received from camera ID {camid}.")
-            break
+    # Read on a background thread so detection always works on the newest frame
+    grabber = FrameGrabber(cap, camid, buffer_size=config.get('frame_buffer_size', 2)).start()
 
-        try:
-            # Resize frame to desired size
-            frame = cv2.resize(frame, (1280, 720))
-
-            # Build overlay text for active processes
-            processes = []
-            if flag_r_zone:
-                processes.append("Restricted Zone Detection")
-            if flag_fire:
-                processes.append("Fire Detection")
-            if flag_gear:
-                processes.append("Safety Gear Detection")
-            if flag_pose_alert:
-                processes.append("Pose Detection")
-
-            # Pose detection processing
-            if flag_pose_alert:
-                def alert_callback(alerts):
-                    for alert in alerts:
-                        threading.Thread(target=play_alert_sound).start()
-                        add_to_db((True, [alert['bbox']]), alert['frame'], "Emergency Pose Detected", user_id)
-                frame = pose_detector.process_frame(frame, alert_callback)
-
-            # Restricted zone detection
-            if flag_r_zone:
-                r_zone_status, r_zone_boxes = r_zone.process(frame, region=region, flag=flag_r_zone)
-                if r_zone_status:
-                    persistent_boxes["restricted_zone"] = r_zone_boxes
-                for box in persistent_boxes["restricted_zone"]:
-                    x1, y1, x2, y2 = box
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 0, 0), 2)
-                    cv2.putText(frame, "Restricted Zone Violation", (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-
-            # Fire detection
-            if flag_fire:
-                fire_status, fire_boxes = fire_det.process(frame, flag=flag_fire)
-                if fire_status:
-                    persistent_boxes["fire"] = fire_boxes
-                for box in persistent_boxes["fire"]:
-                    x1, y1, x2, y2 = box
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                    cv2.putText(frame, "Fire Detected", (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-
-            # Safety gear detection
-            if flag_gear:
-                gear_status, gear_boxes = gear_det.process(frame, flag=flag_gear)
-                if gear_status:
-                    persistent_boxes["gear"] = gear_boxes
-                for box in persistent_boxes["gear"]:
-                    x1, y1, x2, y2 = box
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(frame, "Gear Detected", (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-            # Overlay active process text
-            overlay_text = " + ".join(processes)
-            cv2.putText(frame, overlay_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-
-            # Encode and yield the frame
-            _, buffer = cv2.imencode('.jpg', frame)
-            frame_bytes = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        except Exception as e:
-            logging.error(f"Error processing frame from camera ID {camid}: {e}")
-            continue
+    # Stage latencies, frame rate and the grabber and motion gate counters of this camera
+    camera_key = (user_id, camid)
+    camera_metrics = metrics.start(camera_key)
+    metrics.watch('grabber', grabber.stats, camera_key)
+    if gate is not None:
+        metrics.watch('motion', gate.stats, camera_key)
+    observe = lambda stage, seconds: metrics.observe(stage, seconds, camera_key)
 
-    cap.release()
+    try:
+        while True:
+            with metrics.timer('capture', camera_key):
+                packet, skipped = grabber.read()
+            if packet is None:
+                logging.warning(f"No frames received from camera ID {camid}.")
+                break
+            frame = packet.frame
+            frame_start = time.perf_counter()
+            metrics.frame(camera_key, skipped)
+
+            try:
+                # Resize frame to desired size
+                with metrics.timer('resize', camera_key):
+                    frame = cv2.resize(frame, (1280, 720))
+
+                # Build overlay text for active processes
+                processes = []
+                if flag_r_zone:
+                    processes.append("Restricted Zone Detection")
+                if flag_fire:
+                    processes.append("Fire Detection")
+                if flag_gear:
+                    processes.append("Safety Gear Detection")
+                if flag_pose_alert:
+                    processes.append("Pose Detection")
+
+                # The YOLO models share one letterboxed input tensor per frame
+                preprocessor = FramePreprocessor(frame) if shared_preprocessing else None
+
+                # Independent detectors run concurrently, overlays are drawn once all have finished
+                due = {name for name, every in detection_cadence.items() if frame_index % every == 0}
+                frame_index += 1
+                if gate is not None:
+                    with metrics.timer('motion', camera_key):
+                        moving = gate.should_run(frame)
+                    if not moving:
+                        due = set()
+                stages = []
+                if flag_pose_alert and "pose" in due:
+                    stages.append(Stage("pose", lambda: detect_pose(pose, frame, (user_id, camid))))
+                if flag_r_zone and "restricted_zone" in due:
+                    stages.append(detector_stage("restricted_zone", 'people', frame, region, preprocessor, camera_key))
+                if flag_fire and "fire" in due:
+                    stages.append(detector_stage("fire", 'fire', frame, preprocessor=preprocessor, key=camera_key))
+                if flag_gear and "gear" in due:
+                    stages.append(detector_stage("gear", 'gear', frame, preprocessor=preprocessor, key=camera_key))
+                with metrics.timer('detect', camera_key):
+                    results = stage_graph.run(stages, observe)
+
+                # Carry the boxes of detectors that were skipped this frame along with the motion
+                if tracker is not None:
+                    carried = {name: boxes for name, boxes in persistent_boxes.items() if name not in results}
+                    with metrics.timer('track', camera_key):
+                        persistent_boxes.update(tracker.update(frame, carried))
+
+                # Detections are published as metadata, overlays are only drawn for viewers asking for them
+                event = {
+                    'camera': camid,
+                    'seq': packet.seq,
+                    'timestamp': packet.timestamp,
+                    'width': frame.shape[1],
+                    'height': frame.shape[0],
+                    'processes': processes,
+                    'detections': [],
+                    'alert': None
+                }
+                for name, (label, _) in BOX_OVERLAYS.items():
+                    result = results.get(name)
+                    fresh = bool(result and result[0])
+                    if fresh:
+                        persistent_boxes[name] = result[1]
+                        persistent_details[name] = result[2]
+                    for box, detail in zip(persistent_boxes[name], persistent_details[name]):
+                        event['detections'].append(dict(detail, type=name, label=label, box=box, tracked=not fresh))
+                if results.get("pose"):
+                    event['alert'] = {'type': 'pose', 'label': "Emergency Pose Detected",
+                                      'box': list(PoseEmergencyDetector.alert_box(frame))}
+
+                # Viewers encode the tiers they watch, each tier once per frame
+                payload = EncodedFrame(frame, jpeg_encoder, jpeg_tiers, event=event,
+                                       annotate=lambda img, event=event: draw_detections(img, event),
+                                       observe=observe)
+                if event['alert']:
+                    alert_callback({"frame": payload.annotated().copy(), "bbox": event['alert']['box']})
+                metrics.observe('frame', time.perf_counter() - frame_start, camera_key)
+                yield payload
+            except Exception as e:
+                logging.error(f"Error processing frame from camera ID {camid}: {e}", extra={'throttle': camid})
+                continue
+    finally:
+        motion_gates.pop((user_id, camid), None)
+        # Drop the camera's series, a restarted worker of the same camera keeps its own
+        metrics.remove(camera_key, camera_metrics)
+        grabber.stop()
+        cap.release()
+        logging.info(f"Camera ID {camid} frame stats: {grabber.stats()}")
 
 # Gemini API routes for chatbot functionality
 def test_gemini_endpoints(api_key, test_message="Hello", max_tokens=2048):
@@ -851,4 +1582,9 @@ def debug_gemini():
         return jsonify({'success': False, 'error': f'Debug failed: {str(e)}'})
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    debug = True
+    # The debug reloader also runs this block in its watcher process, which serves nothing;
+    # only its serving child (WERKZEUG_RUN_MAIN) pre-warms, a run without it does so at once
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_prewarm()
+    app.run(debug=debug)
@@ -0,0 +1,103 @@
+"""
+Compare the exported CPU backends with PyTorch on a reference clip:
+per-frame latency of every detector and how well its boxes agree with
+the PyTorch ones (boxes matched at IoU >= 0.5).
+
+Usage: python benchmarks/bench_backends.py clip.mp4 [--backends pytorch onnx onnx_int8] [--frames N]
+
+Export the weights first with: python -m models.model_export
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.config_loader import load_config
+from models.fire_detection import fire_detection
+from models.gear_detection import gear_detection
+from models.r_zone import people_detection
+
+DETECTORS = {'fire': fire_detection, 'gear': gear_detection, 'people': people_detection}
+
+
+def load_frames(source, count):
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (1280, 720)))
+    cap.release()
+    return frames
+
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union else 0.0
+
+
+def matched(reference, boxes, threshold=0.5):
+    unused = list(reference)
+    hits = 0
+    for box in boxes:
+        best = max(unused, key=lambda ref: iou(ref, box), default=None)
+        if best is not None and iou(best, box) >= threshold:
+            unused.remove(best)
+            hits += 1
+    return hits
+
+
+def run(detector, frames):
+    boxes, latencies = [], []
+    detector.process(frames[0])  # warm-up
+    for frame in frames:
+        start = time.perf_counter()
+        found = detector.process(frame)[1]
+        latencies.append(time.perf_counter() - start)
+        boxes.append(found)
+    return boxes, np.array(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source', help="reference video clip")
+    parser.add_argument('--backends', nargs='+', default=['pytorch', 'onnx', 'onnx_int8'])
+    parser.add_argument('--frames', type=int, default=200)
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    if not frames:
+        sys.exit(f"No frames could be read from {args.source}")
+    config = load_config()
+    print(f"{'detector':8} {'backend':14} {'mean ms':>8} {'p95 ms':>8} {'precision':>9} {'recall':>7}")
+    for name, detector_class in DETECTORS.items():
+        reference = None
+        for backend in ['pytorch'] + [b for b in args.backends if b != 'pytorch']:
+            try:
+                detector = detector_class(dict(config, backend=backend))
+            except Exception as e:
+                print(f"{name:8} {backend:14} unavailable: {e}")
+                continue
+            boxes, latencies = run(detector, frames)
+            if reference is None:
+                reference = boxes
+            hits = sum(matched(ref, found) for ref, found in zip(reference, boxes))
+            predicted = sum(len(found) for found in boxes)
+            expected = sum(len(ref) for ref in reference)
+            precision = hits / predicted if predicted else 1.0
+            recall = hits / expected if expected else 1.0
+            print(f"{name:8} {backend:14} {latencies.mean():8.2f} {np.percentile(latencies, 95):8.2f} "
+                  f"{precision:9.3f} {recall:7.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Alert insert and notification read throughput on SQLite under concurrent
+camera writers, with the default journal and no indexes versus WAL, the
+tuned pragmas and the composite indexes of migration 84b57e409dff.
+
+Usage: python benchmarks/bench_db.py [--writers 8] [--seconds 5] [--history 100000]
+
+Runs on a throw-away database in a temporary directory.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.sqlite_tuning import DEFAULT_PRAGMAS, apply_pragmas
+
+ALERT_TYPES = ["Emergency Pose Detected", "Fire Detected", "Restricted Zone Violation", "Gear Missing"]
+
+SCHEMA = """
+CREATE TABLE alert (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER,
+    date_time DATETIME,
+    alert_type VARCHAR(50),
+    Cam_id VARCHAR(100),
+    snapshot VARCHAR(80)
+)
+"""
+
+INDEXES = [
+    "CREATE INDEX ix_alert_user_id_alert_type_date_time ON alert (user_id, alert_type, date_time)",
+    "CREATE INDEX ix_alert_user_id_date_time_id ON alert (user_id, date_time, id)",
+    "CREATE INDEX ix_alert_snapshot ON alert (snapshot)",
+]
+
+# The notifications page and the latest-alert lookup, as issued by app.py
+PAGE = sa.text("SELECT id, date_time, alert_type, snapshot FROM alert WHERE user_id = :user "
+               "ORDER BY date_time DESC, id DESC LIMIT 26")
+LATEST = sa.text("SELECT max(date_time) FROM alert WHERE user_id = :user AND alert_type = :type")
+
+
+def make_engine(path, tuned):
+    engine = sa.create_engine(f"sqlite:///{path}", connect_args={'timeout': 30})
+
+    @sa.event.listens_for(engine, 'connect')
+    def connect(dbapi_connection, connection_record):
+        if tuned:
+            apply_pragmas(dbapi_connection, DEFAULT_PRAGMAS)
+        else:
+            apply_pragmas(dbapi_connection, {'journal_mode': 'DELETE', 'synchronous': 'FULL'})
+
+    return engine
+
+
+def populate(path, history, users, indexed):
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    start = datetime.now() - timedelta(days=365)
+    rows = [(random.randint(1, users), (start + timedelta(seconds=i * 30)).isoformat(' '),
+             random.choice(ALERT_TYPES), str(random.randint(0, 15)), None) for i in range(history)]
+    conn.executemany("INSERT INTO alert (user_id, date_time, alert_type, Cam_id, snapshot) VALUES (?, ?, ?, ?, ?)", rows)
+    if indexed:
+        for statement in INDEXES:
+            conn.execute(statement)
+    conn.commit()
+    conn.close()
+
+
+def run(engine, writers, seconds, users, batch):
+    stop = threading.Event()
+    inserted = [0] * writers
+    reads = []
+    read_latency = []
+    write_latency = []
+    lock = threading.Lock()
+
+    def writer(index):
+        while not stop.is_set():
+            now = datetime.now()
+            values = [{'user': random.randint(1, users), 'time': now, 'type': random.choice(ALERT_TYPES),
+                       'cam': str(index)} for _ in range(batch)]
+            begin = time.perf_counter()
+            with engine.begin() as conn:
+                conn.execute(sa.text("INSERT INTO alert (user_id, date_time, alert_type, Cam_id) "
+                                     "VALUES (:user, :time, :type, :cam)"), values)
+            with lock:
+                write_latency.append(time.perf_counter() - begin)
+            inserted[index] += batch
+
+    def reader():
+        while not stop.is_set():
+            user = random.randint(1, users)
+            begin = time.perf_counter()
+            with engine.connect() as conn:
+                conn.execute(PAGE, {'user': user}).all()
+                conn.execute(LATEST, {'user': user, 'type': random.choice(ALERT_TYPES)}).all()
+            with lock:
+                read_latency.append(time.perf_counter() - begin)
+            reads.append(1)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return (sum(inserted) / seconds, len(reads) / seconds,
+            np.array(write_latency) * 1000, np.array(read_latency) * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=8, help="concurrent camera writers")
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--history', type=int, default=100000, help="alerts already in the table")
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=1, help="alerts per commit")
+    args = parser.parse_args()
+
+    print(f"{'profile':10} {'inserts/s':>10} {'pages/s':>8} {'write p95 ms':>13} {'read p95 ms':>12}")
+    for label, tuned in (('baseline', False), ('tuned', True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            populate(path, args.history, args.users, indexed=tuned)
+            engine = make_engine(path, tuned)
+            inserts, pages, writes, reads = run(engine, args.writers, args.seconds, args.users, args.batch)
+            engine.dispose()
+        print(f"{label:10} {inserts:10.0f} {pages:8.0f} {np.percentile(writes, 95):13.2f} "
+              f"{np.percentile(reads, 95):12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Measure the shared preprocessing pass against letting every YOLO model
+letterbox the frame on its own, and check both give the same boxes.
+
+Usage: python benchmarks/bench_preprocess.py [video_or_image] [--frames N] [--models]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.preprocess import FramePreprocessor, PreparedFrame
+
+
+def load_frames(source, count):
+    if source is None:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(count)]
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, (1280, 720)))
+    cap.release()
+    return frames
+
+
+def time_preprocessing(frames, models=3):
+    start = time.perf_counter()
+    for frame in frames:
+        for _ in range(models):
+            PreparedFrame(frame)
+    separate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for frame in frames:
+        preprocessor = FramePreprocessor(frame)
+        for _ in range(models):
+            preprocessor.get()
+    shared = time.perf_counter() - start
+    return separate, shared
+
+
+def compare_models(frames):
+    from models.config_loader import load_config
+    from models.fire_detection import fire_detection
+    from models.gear_detection import gear_detection
+    from models.r_zone import people_detection
+
+    config = load_config()
+    detectors = {
+        'fire': fire_detection(config),
+        'gear': gear_detection(config),
+        'people': people_detection(config),
+    }
+    mismatches = 0
+    for frame in frames:
+        preprocessor = FramePreprocessor(frame)
+        for name, detector in detectors.items():
+            prepared = preprocessor.get(detector.imgsz, detector.rect)
+            if name == 'people':
+                # Plain prediction, tracker state would differ between the two runs
+                direct = detector._boxes(detector.model(frame, verbose=False)[0], None, frame.shape)
+                shared = detector._boxes(detector.model(prepared.tensor, verbose=False)[0], None, frame.shape, prepared)
+            else:
+                direct = detector.process(frame)
+                shared = detector.process(frame, prepared=prepared)
+            if direct != shared:
+                mismatches += 1
+                print(f"{name}: {direct} != {shared}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('source', nargs='?', help="video or image, random frames if omitted")
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--models', action='store_true', help="also compare detector outputs")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    separate, shared = time_preprocessing(frames)
+    per_frame = 1000.0 / len(frames)
+    print(f"frames: {len(frames)}")
+    print(f"separate preprocessing (3 models): {separate * per_frame:.2f} ms/frame")
+    print(f"shared preprocessing:              {shared * per_frame:.2f} ms/frame")
+    print(f"saved:                             {(separate - shared) * per_frame:.2f} ms/frame")
+
+    if args.models:
+        mismatches = compare_models(frames)
+        print(f"detector mismatches: {mismatches}")
+        sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
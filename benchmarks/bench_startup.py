@@ -0,0 +1,59 @@
+"""
+Measure application startup: wall time and peak RSS of `import app`,
+and what loading the detectors on top of it costs (the old eager startup),
+each in a fresh interpreter.
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--models people fire gear]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+loads = {}
+for name in sys.argv[1:]:
+    begin = time.perf_counter()
+    app.model_registry.get(name)
+    loads[name] = time.perf_counter() - begin
+# ru_maxrss is in KiB on Linux
+print(json.dumps({'import': imported, 'total': time.perf_counter() - start, 'loads': loads,
+                  'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def measure(models):
+    out = subprocess.run([sys.executable, '-c', CHILD] + models, cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--models', nargs='+', default=['people', 'fire', 'gear'])
+    args = parser.parse_args()
+
+    print(f"{'startup':10} {'mean s':>8} {'max s':>8} {'peak MB':>8}")
+    for label, models in (('lazy', []), ('eager', args.models)):
+        runs = [measure(models) for _ in range(args.runs)]
+        totals = np.array([run['total'] for run in runs])
+        rss = max(run['rss_mb'] for run in runs)
+        print(f"{label:10} {totals.mean():8.2f} {totals.max():8.2f} {rss:8.0f}")
+        if models:
+            for name in models:
+                loads = np.array([run['loads'][name] for run in runs])
+                print(f"  first {name} load: {loads.mean():.2f} s")
+
+
+if __name__ == '__main__':
+    main()
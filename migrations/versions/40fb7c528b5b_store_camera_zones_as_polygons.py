@@ -0,0 +1,35 @@
+"""store camera zones as polygons
+
+Revision ID: 40fb7c528b5b
+Revises: 60b8696d67e0
+Create Date: 2026-10-18 14:40:37.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '40fb7c528b5b'
+down_revision = '60b8696d67e0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The old boolean never held coordinates, there is nothing to carry over
+    op.execute("UPDATE camera SET region = NULL")
+    with op.batch_alter_table('camera', schema=None) as batch_op:
+        batch_op.alter_column('region',
+               existing_type=sa.Boolean(),
+               type_=sa.Text(),
+               existing_nullable=True)
+
+
+def downgrade():
+    op.execute("UPDATE camera SET region = NULL")
+    with op.batch_alter_table('camera', schema=None) as batch_op:
+        batch_op.alter_column('region',
+               existing_type=sa.Text(),
+               type_=sa.Boolean(),
+               existing_nullable=True)
@@ -0,0 +1,78 @@
+"""move snapshots and complaint files to the file store
+
+Revision ID: 458a395c7fe1
+Revises: 8b65affcaf99
+Create Date: 2026-10-18 17:12:05.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '458a395c7fe1'
+down_revision = '8b65affcaf99'
+branch_labels = None
+depends_on = None
+
+
+def _store():
+    from flask import current_app
+    from models.config_loader import load_config
+    from models.snapshot_store import SnapshotStore, store_root
+    return SnapshotStore(store_root(load_config(), current_app.instance_path))
+
+
+def upgrade():
+    from models.snapshot_store import sniff_ext
+    store = _store()
+    with op.batch_alter_table('alert', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('snapshot', sa.String(length=80), nullable=True))
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_ref', sa.String(length=80), nullable=True))
+        batch_op.add_column(sa.Column('file_name', sa.String(length=255), nullable=True))
+
+    # Move the BLOBs out one row at a time, a whole table of them never sits in memory
+    bind = op.get_bind()
+    ids = bind.execute(sa.text("SELECT id FROM alert WHERE frame_snapshot IS NOT NULL")).scalars().all()
+    for alert_id in ids:
+        data = bind.execute(sa.text("SELECT frame_snapshot FROM alert WHERE id = :id"), {'id': alert_id}).scalar()
+        bind.execute(sa.text("UPDATE alert SET snapshot = :ref WHERE id = :id"),
+                     {'ref': store.put(data, '.jpg'), 'id': alert_id})
+    ids = bind.execute(sa.text("SELECT id FROM complaint WHERE file_data IS NOT NULL")).scalars().all()
+    for complaint_id in ids:
+        data = bind.execute(sa.text("SELECT file_data FROM complaint WHERE id = :id"), {'id': complaint_id}).scalar()
+        # Original names were never kept, the type comes from the file's leading bytes;
+        # unknown types get no extension and are only served as downloads
+        ext = sniff_ext(data)
+        bind.execute(sa.text("UPDATE complaint SET file_ref = :ref, file_name = :name WHERE id = :id"),
+                     {'ref': store.put(data, ext), 'name': f"complaint_{complaint_id}{ext}", 'id': complaint_id})
+
+    with op.batch_alter_table('alert', schema=None) as batch_op:
+        batch_op.drop_column('frame_snapshot')
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.drop_column('file_data')
+
+
+def downgrade():
+    store = _store()
+    with op.batch_alter_table('alert', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('frame_snapshot', sa.LargeBinary(), nullable=True))
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_data', sa.LargeBinary(), nullable=True))
+
+    bind = op.get_bind()
+    for alert_id, ref in bind.execute(sa.text("SELECT id, snapshot FROM alert WHERE snapshot IS NOT NULL")).all():
+        if store.exists(ref):
+            bind.execute(sa.text("UPDATE alert SET frame_snapshot = :data WHERE id = :id"),
+                         {'data': store.read(ref), 'id': alert_id})
+    for complaint_id, ref in bind.execute(sa.text("SELECT id, file_ref FROM complaint WHERE file_ref IS NOT NULL")).all():
+        if store.exists(ref):
+            bind.execute(sa.text("UPDATE complaint SET file_data = :data WHERE id = :id"),
+                         {'data': store.read(ref), 'id': complaint_id})
+
+    with op.batch_alter_table('alert', schema=None) as batch_op:
+        batch_op.drop_column('snapshot')
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.drop_column('file_name')
+        batch_op.drop_column('file_ref')
@@ -0,0 +1,43 @@
+"""add alert rollups per hour and day
+
+Revision ID: 5a471b0cec08
+Revises: 84b57e409dff
+Create Date: 2026-10-18 18:48:19.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a471b0cec08'
+down_revision = '84b57e409dff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('alert_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('Cam_id', sa.String(length=100), nullable=False),
+    sa.Column('alert_type', sa.String(length=50), nullable=False),
+    sa.Column('period', sa.String(length=4), nullable=False),
+    sa.Column('bucket', sa.DateTime(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'period', 'bucket', 'alert_type', 'Cam_id', name='uq_alert_rollup_key')
+    )
+    # Backfill from the existing alerts, buckets formatted like SQLAlchemy stores DateTime
+    for period, fmt in (('hour', '%Y-%m-%d %H:00:00.000000'), ('day', '%Y-%m-%d 00:00:00.000000')):
+        op.execute(
+            "INSERT INTO alert_rollup (user_id, Cam_id, alert_type, period, bucket, count) "
+            f"SELECT user_id, COALESCE(Cam_id, ''), alert_type, '{period}', strftime('{fmt}', date_time), COUNT(*) "
+            "FROM alert WHERE date_time IS NOT NULL AND alert_type IS NOT NULL "
+            f"GROUP BY user_id, COALESCE(Cam_id, ''), alert_type, strftime('{fmt}', date_time)"
+        )
+
+
+def downgrade():
+    op.drop_table('alert_rollup')
@@ -0,0 +1,26 @@
+"""add camera motion sensitivity
+
+Revision ID: 60b8696d67e0
+Revises: e8e6130d4de1
+Create Date: 2026-10-18 14:02:11.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '60b8696d67e0'
+down_revision = 'e8e6130d4de1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('camera', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('motion_sensitivity', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('camera', schema=None) as batch_op:
+        batch_op.drop_column('motion_sensitivity')
@@ -0,0 +1,43 @@
+"""add indexes for the hot alert, camera and complaint queries
+
+Revision ID: 84b57e409dff
+Revises: 458a395c7fe1
+Create Date: 2026-10-18 18:05:44.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '84b57e409dff'
+down_revision = '458a395c7fe1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('alert', schema=None) as batch_op:
+        batch_op.create_index('ix_alert_user_id_alert_type_date_time', ['user_id', 'alert_type', 'date_time'], unique=False)
+        batch_op.create_index('ix_alert_user_id_date_time_id', ['user_id', 'date_time', 'id'], unique=False)
+        batch_op.create_index('ix_alert_snapshot', ['snapshot'], unique=False)
+
+    with op.batch_alter_table('camera', schema=None) as batch_op:
+        batch_op.create_index('ix_camera_user_id_Cam_id', ['user_id', 'Cam_id'], unique=False)
+
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.create_index('ix_complaint_user_id_id', ['user_id', 'id'], unique=False)
+        batch_op.create_index('ix_complaint_file_ref', ['file_ref'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('complaint', schema=None) as batch_op:
+        batch_op.drop_index('ix_complaint_file_ref')
+        batch_op.drop_index('ix_complaint_user_id_id')
+
+    with op.batch_alter_table('camera', schema=None) as batch_op:
+        batch_op.drop_index('ix_camera_user_id_Cam_id')
+
+    with op.batch_alter_table('alert', schema=None) as batch_op:
+        batch_op.drop_index('ix_alert_snapshot')
+        batch_op.drop_index('ix_alert_user_id_date_time_id')
+        batch_op.drop_index('ix_alert_user_id_alert_type_date_time')
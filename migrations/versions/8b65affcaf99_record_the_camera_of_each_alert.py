@@ -0,0 +1,26 @@
+"""record the camera of each alert
+
+Revision ID: 8b65affcaf99
+Revises: 40fb7c528b5b
+Create Date: 2026-10-18 16:40:27.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b65affcaf99'
+down_revision = '40fb7c528b5b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('alert', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('Cam_id', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('alert', schema=None) as batch_op:
+        batch_op.drop_column('Cam_id')
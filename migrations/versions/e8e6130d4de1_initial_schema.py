@@ -0,0 +1,67 @@
+"""initial schema
+
+Revision ID: e8e6130d4de1
+Revises: 
+Create Date: 2025-01-12 10:24:51.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8e6130d4de1'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=100), nullable=False),
+    sa.Column('password', sa.String(length=200), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_table('alert',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('date_time', sa.DateTime(), nullable=True),
+    sa.Column('alert_type', sa.String(length=50), nullable=True),
+    sa.Column('frame_snapshot', sa.LargeBinary(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('camera',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('Cam_id', sa.String(length=100), nullable=True),
+    sa.Column('fire_detection', sa.Boolean(), nullable=True),
+    sa.Column('pose_alert', sa.Boolean(), nullable=True),
+    sa.Column('restricted_zone', sa.Boolean(), nullable=True),
+    sa.Column('safety_gear_detection', sa.Boolean(), nullable=True),
+    sa.Column('region', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('complaint',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('full_name', sa.String(length=100), nullable=True),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('alert_type', sa.String(length=50), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('file_data', sa.LargeBinary(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('complaint')
+    op.drop_table('camera')
+    op.drop_table('alert')
+    op.drop_table('user')
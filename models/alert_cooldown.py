@@ -0,0 +1,67 @@
+import threading
+import logging
+from datetime import timedelta
+
+
+class AlertCooldown:
+    """
+    this class remembers when each (user, camera, alert type) last raised
+    an alert, so repeated detections inside the cooldown are dropped
+    without touching the database. the times are seeded from the
+    database on first use.
+
+    Args:
+    cooldown: seconds between two alerts of the same key.
+    seed_fn: callable returning (key, datetime) pairs of the latest alerts.
+    """
+
+    def __init__(self, cooldown=60, seed_fn=None):
+        self.cooldown = timedelta(seconds=cooldown)
+        self.seed_fn = seed_fn
+        self.suppressed = 0
+        self._last = {}
+        self._seeded = seed_fn is None
+        self._lock = threading.Lock()
+
+    def seed(self):
+        """
+        loads the latest alert times, once
+        """
+        with self._lock:
+            if not self._seeded:
+                self._seed()
+
+    def _seed(self):
+        try:
+            for key, date_time in self.seed_fn():
+                if date_time is not None:
+                    self._last[key] = max(date_time, self._last.get(key, date_time))
+            logging.info(f"Alert cooldown seeded with {len(self._last)} keys.")
+        except Exception as e:
+            logging.error(f"Seeding the alert cooldown failed: {e}")
+        self._seeded = True
+
+    def allow(self, key, now):
+        """
+        returns True and starts the cooldown of key if it is not cooling down
+        """
+        with self._lock:
+            if not self._seeded:
+                self._seed()
+            last = self._last.get(key)
+            if last is not None and now - last <= self.cooldown:
+                self.suppressed += 1
+                return False
+            self._last[key] = now
+            return True
+
+    def release(self, key, now):
+        """
+        forgets the alert allowed at now, e.g. when it could not be queued
+        """
+        with self._lock:
+            if self._last.get(key) == now:
+                del self._last[key]
+
+    def stats(self):
+        return {'keys': len(self._last), 'suppressed': self.suppressed}
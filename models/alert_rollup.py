@@ -0,0 +1,38 @@
+from collections import Counter
+from datetime import timedelta
+
+PERIODS = ('hour', 'day')
+
+
+def bucket_of(date_time, period):
+    """
+    this function returns the start of the hour or day containing date_time
+    """
+    if period == 'hour':
+        return date_time.replace(minute=0, second=0, microsecond=0)
+    if period == 'day':
+        return date_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown rollup period {period}")
+
+
+def rollup_counts(alerts):
+    """
+    this function counts a batch of alerts per (user_id, Cam_id,
+    alert_type, period, bucket), the increments applied to the rollup
+    table. alerts without a camera are counted under ''.
+    """
+    counts = Counter()
+    for alert in alerts:
+        for period in PERIODS:
+            counts[(alert['user_id'], alert.get('Cam_id') or '', alert['alert_type'],
+                    period, bucket_of(alert['date_time'], period))] += 1
+    return counts
+
+
+def bucket_range(now, period, count):
+    """
+    this function returns the starts of the last count buckets up to now, oldest first
+    """
+    step = timedelta(hours=1) if period == 'hour' else timedelta(days=1)
+    last = bucket_of(now, period)
+    return [last - step * i for i in range(count - 1, -1, -1)]
@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+import logging
+
+
+class AlertWriter:
+    """
+    this class takes alerts off the camera frame loops: they go into a
+    bounded in-memory queue and a background thread writes them to the
+    database in batches. when the queue is full new alerts are dropped
+    and counted, a slow database never blocks a camera.
+
+    Args:
+    write_fn: callable taking a list of alerts and committing them.
+    max_queue: largest number of alerts waiting to be written.
+    max_batch: largest number of alerts committed together.
+    max_wait: seconds to wait for more alerts once the first one arrived.
+    """
+
+    def __init__(self, write_fn, max_queue=256, max_batch=32, max_wait=0.5):
+        self.write_fn = write_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.commit_time = 0.0
+        self.max_commit_time = 0.0
+        self.last_commit_time = 0.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop_event = threading.Event()
+        # Started by the first alert, processes that only import the app run no writer
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None and not self._stop_event.is_set():
+                self._thread = threading.Thread(target=self._run, name="alert-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, alert):
+        """
+        queues one alert without blocking, returns False if it was dropped
+        """
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+            logging.error(f"Alert queue full, dropped alert ({self.dropped} dropped so far).")
+            return False
+        self.submitted += 1
+        return True
+
+    def stop(self, timeout=5.0):
+        """
+        stops the writer once the queued alerts have been written
+        """
+        with self._start_lock:
+            self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        pending = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            pending = self._collect()
+            if not pending:
+                continue
+            start = time.perf_counter()
+            try:
+                self.write_fn(pending)
+            except Exception as e:
+                self.failed += len(pending)
+                logging.error(f"Writing {len(pending)} alerts failed: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            self.batches += 1
+            self.written += len(pending)
+            self.commit_time += elapsed
+            self.last_commit_time = elapsed
+            self.max_commit_time = max(self.max_commit_time, elapsed)
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'submitted': self.submitted,
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'batches': self.batches,
+            'avg_commit_ms': 1000 * self.commit_time / self.batches if self.batches else 0.0,
+            'last_commit_ms': 1000 * self.last_commit_time,
+            'max_commit_ms': 1000 * self.max_commit_time,
+        }
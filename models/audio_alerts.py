@@ -0,0 +1,141 @@
+import threading
+import time
+import logging
+
+
+class PlaysoundBackend:
+    """
+    this class plays the alert sound on the server's speakers with playsound.
+
+    Args:
+    path: sound file played for every alert.
+    """
+
+    name = 'playsound'
+
+    def __init__(self, path):
+        self.path = path
+
+    def play(self, alert):
+        from playsound import playsound
+        playsound(self.path)
+
+
+class NullBackend:
+    """
+    this class stands in for the speakers on headless servers, alerts are
+    only counted and logged.
+    """
+
+    name = 'none'
+
+    def play(self, alert):
+        logging.debug(f"Alert sound for {alert} skipped (no audio backend).")
+
+
+class AudioAlerter:
+    """
+    this class plays alert sounds from a single worker thread. play()
+    returns at once; a request for an alert that is already waiting is
+    merged into it, one made within the cooldown of the last playback of
+    the same alert is dropped, and when several alerts wait the one with
+    the lowest priority number is played first. a waiting alert of higher
+    priority cuts the repeats of the current one short.
+
+    Args:
+    backend: object with play(alert), blocking until the sound has played.
+    cooldown: seconds after a playback during which the same alert is not played again.
+    repeat: times the sound is played per alert.
+    priorities: alert name -> priority, lower plays first; unknown alerts get the lowest.
+    """
+
+    def __init__(self, backend, cooldown=10.0, repeat=3, priorities=None):
+        self.backend = backend
+        self.cooldown = cooldown
+        self.repeat = repeat
+        self.priorities = priorities or {}
+        self.requested = 0
+        self.merged = 0
+        self.suppressed = 0
+        self.played = 0
+        self.interrupted = 0
+        self.failed = 0
+        self._pending = {}
+        self._last_played = {}
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        # Started by the first alert, processes that only import the app run no worker
+        self._thread = None
+
+    def _priority(self, alert):
+        return self.priorities.get(alert, max(self.priorities.values(), default=0) + 1)
+
+    def play(self, alert):
+        """
+        queues the sound of alert, returns False if it was merged or dropped
+        """
+        now = time.monotonic()
+        with self._cond:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name="audio-alerts", daemon=True)
+                self._thread.start()
+            self.requested += 1
+            if alert in self._pending:
+                self.merged += 1
+                return False
+            if now - self._last_played.get(alert, float('-inf')) < self.cooldown:
+                self.suppressed += 1
+                return False
+            self._seq += 1
+            self._pending[alert] = (self._priority(alert), self._seq)
+            self._cond.notify()
+            return True
+
+    def stop(self, timeout=5.0):
+        with self._cond:
+            self._stopping = True
+            self._pending.clear()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def _more_urgent(self, priority):
+        with self._cond:
+            return self._stopping or any(p < priority for p, _ in self._pending.values())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                alert = min(self._pending, key=self._pending.get)
+                priority, _ = self._pending.pop(alert)
+                self._last_played[alert] = time.monotonic()
+            try:
+                for i in range(self.repeat):
+                    if i and self._more_urgent(priority):
+                        self.interrupted += 1
+                        break
+                    self.backend.play(alert)
+                self.played += 1
+                logging.info(f"Alert sound for {alert} played successfully.")
+            except Exception as e:
+                self.failed += 1
+                logging.error(f"Error playing alert sound: {str(e)}")
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            'backend': self.backend.name,
+            'pending': pending,
+            'requested': self.requested,
+            'merged': self.merged,
+            'suppressed': self.suppressed,
+            'played': self.played,
+            'interrupted': self.interrupted,
+            'failed': self.failed,
+        }
@@ -0,0 +1,93 @@
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+
+class BatchScheduler:
+    """
+    this class collects single-frame requests coming from many camera
+    workers and runs them through the model as one batch.
+
+    Args:
+    batch_fn: callable taking a list of items and returning one result per item.
+    name: label used in log messages.
+    max_batch: largest number of items run together.
+    max_wait: seconds to wait for more items once the first one arrived.
+    timeout: seconds a caller of the scheduler waits for its result.
+    """
+
+    def __init__(self, batch_fn, name, max_batch=16, max_wait=0.02, timeout=10.0):
+        self.batch_fn = batch_fn
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"batch-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        queues one item and returns a Future resolving to its result
+        """
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result(self.timeout)
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=2.0)
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        pending = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            pending = self._collect()
+            if not pending:
+                continue
+            items = [item for item, _ in pending]
+            try:
+                results = list(self.batch_fn(items))
+                if len(results) != len(items):
+                    # Results are matched to items by position, a short list matches none reliably
+                    raise ValueError(f"Batch of {len(items)} items gave {len(results)} results")
+            except Exception as e:
+                logging.error(f"Batched {self.name} inference failed: {e}", extra={'throttle': self.name})
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            for (_, future), result in zip(pending, results):
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'queued': self._queue.qsize(),
+            'avg_batch': self.items / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+
+
+class BoxTracker:
+    """
+    this class moves boxes between detection frames using sparse
+    Lucas-Kanade optical flow, which is far cheaper than running a model.
+
+    Args:
+    scale: factor the frames are downscaled by before computing the flow.
+    grid: points sampled per box side.
+    """
+
+    def __init__(self, scale=0.5, grid=4):
+        self.scale = scale
+        self.grid = grid
+        self.prev_gray = None
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+    def _gray(self, frame):
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def _points(self, box):
+        x1, y1, x2, y2 = (v * self.scale for v in box)
+        xs = np.linspace(x1, x2, self.grid + 2)[1:-1]
+        ys = np.linspace(y1, y2, self.grid + 2)[1:-1]
+        return np.array([[x, y] for y in ys for x in xs], dtype=np.float32).reshape(-1, 1, 2)
+
+    def update(self, frame, boxes_by_name):
+        """
+        shifts every box by the median flow of the points inside it and
+        returns the moved boxes under the same names. the frame becomes
+        the reference for the next call.
+        """
+        gray = self._gray(frame)
+        prev_gray, self.prev_gray = self.prev_gray, gray
+        if prev_gray is None or prev_gray.shape != gray.shape:
+            return boxes_by_name
+
+        h, w = frame.shape[:2]
+        moved = {}
+        for name, boxes in boxes_by_name.items():
+            moved[name] = []
+            for box in boxes:
+                points = self._points(box)
+                new_points, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, points, None, **self.lk_params)
+                good = status.reshape(-1) == 1
+                if not good.any():
+                    moved[name].append(box)
+                    continue
+                dx, dy = np.median((new_points - points).reshape(-1, 2)[good], axis=0) / self.scale
+                x1, y1, x2, y2 = box
+                moved[name].append([
+                    int(round(min(max(x1 + dx, 0), w))), int(round(min(max(y1 + dy, 0), h))),
+                    int(round(min(max(x2 + dx, 0), w))), int(round(min(max(y2 + dy, 0), h)))
+                ])
+        return moved
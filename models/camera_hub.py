@@ -0,0 +1,249 @@
+import threading
+import time
+import logging
+
+
+class FrameBroadcaster:
+    """
+    this class holds the latest payload published by a camera worker
+    and wakes up every viewer waiting for a newer one, as well as the
+    listener events of viewers following several cameras at once.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._payload = None
+        self._closed = False
+        self._listeners = set()
+
+    def publish(self, payload):
+        with self._cond:
+            self._seq += 1
+            self._payload = payload
+            self._cond.notify_all()
+            for listener in self._listeners:
+                listener.set()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            for listener in self._listeners:
+                listener.set()
+
+    def add_listener(self, event):
+        """
+        sets the threading.Event on every publish and on close
+        """
+        with self._cond:
+            self._listeners.add(event)
+
+    def remove_listener(self, event):
+        with self._cond:
+            self._listeners.discard(event)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def wait(self, last_seq, timeout=None):
+        """
+        blocks until a payload newer than last_seq is available and
+        returns (seq, payload). payload is None on timeout or close.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != last_seq or self._closed, timeout)
+            if self._seq == last_seq:
+                return last_seq, None
+            return self._seq, self._payload
+
+
+class CameraStream:
+    """
+    this class runs one long lived capture-and-detect worker for a camera
+    and fans the annotated frames out to any number of viewers.
+
+    Args:
+    key: identifier of the stream, (user_id, Cam_id).
+    frame_source: callable returning an iterator of payloads.
+    idle_timeout: seconds to keep running once the last viewer left.
+    """
+
+    def __init__(self, key, frame_source, idle_timeout=10.0, on_stop=None):
+        self.key = key
+        self.frame_source = frame_source
+        self.idle_timeout = idle_timeout
+        self.on_stop = on_stop
+        self.broadcaster = FrameBroadcaster()
+        self._lock = threading.Lock()
+        self._viewers = 0
+        self._idle_since = time.monotonic()
+        self._stopping = False
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"camera-{key}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def viewers(self):
+        return self._viewers
+
+    @property
+    def alive(self):
+        return self._thread.is_alive() and not self._stopping
+
+    def attach(self):
+        """
+        registers a viewer, returns False if the worker is shutting down
+        """
+        with self._lock:
+            if self._stopping:
+                return False
+            self._viewers += 1
+            return True
+
+    def detach(self):
+        with self._lock:
+            self._viewers = max(0, self._viewers - 1)
+            if self._viewers == 0:
+                self._idle_since = time.monotonic()
+
+    def _should_stop(self):
+        with self._lock:
+            if self._stop_event.is_set():
+                self._stopping = True
+            elif self._viewers == 0 and time.monotonic() - self._idle_since > self.idle_timeout:
+                self._stopping = True
+            return self._stopping
+
+    def _run(self):
+        source = self.frame_source()
+        try:
+            for payload in source:
+                self.broadcaster.publish(payload)
+                if self._should_stop():
+                    break
+        except Exception as e:
+            logging.error(f"Camera worker {self.key} failed: {e}")
+        finally:
+            with self._lock:
+                self._stopping = True
+            if hasattr(source, 'close'):
+                source.close()
+            self.broadcaster.close()
+            logging.info(f"Camera worker {self.key} stopped.")
+            if self.on_stop:
+                self.on_stop(self)
+
+    def frames(self, poll_interval=1.0):
+        """
+        yields payloads to one viewer, the viewer must already be attached
+        """
+        seq = 0
+        try:
+            while True:
+                seq, payload = self.broadcaster.wait(seq, timeout=poll_interval)
+                if payload is None:
+                    if self.broadcaster.closed:
+                        break
+                    continue
+                yield payload
+        finally:
+            self.detach()
+
+
+class CameraHub:
+    """
+    this class keeps a single CameraStream per camera so that every
+    viewer of the same camera shares one decoder and one detection loop.
+    """
+
+    def __init__(self, idle_timeout=10.0):
+        self.idle_timeout = idle_timeout
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, key, frame_source):
+        """
+        returns a generator of payloads for key, starting the worker
+        with frame_source if none is running.
+        """
+        return self._attach(key, frame_source).frames()
+
+    def subscribe_many(self, sources, poll_interval=1.0):
+        """
+        returns one generator of the payloads of every (key, frame_source)
+        in sources, so a dashboard follows all its cameras over a single
+        connection. it ends once any of the workers stops, for the client
+        to reconnect and get a fresh one.
+        """
+        streams = [self._attach(key, frame_source) for key, frame_source in sources]
+        return _merge(streams, poll_interval)
+
+    def _attach(self, key, frame_source):
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is None or not stream.attach():
+                stream = CameraStream(key, frame_source, self.idle_timeout, on_stop=self._discard)
+                stream.attach()
+                self._streams[key] = stream
+                stream.start()
+                logging.info(f"Camera worker {key} started.")
+        return stream
+
+    def stop(self, key):
+        """
+        stops the worker for key, viewers reconnecting get a fresh one
+        """
+        with self._lock:
+            stream = self._streams.pop(key, None)
+        if stream:
+            stream.stop()
+
+    def stop_all(self):
+        with self._lock:
+            streams = list(self._streams.values())
+            self._streams.clear()
+        for stream in streams:
+            stream.stop()
+
+    def stats(self):
+        with self._lock:
+            return {key: stream.viewers for key, stream in self._streams.items()}
+
+    def _discard(self, stream):
+        with self._lock:
+            if self._streams.get(stream.key) is stream:
+                del self._streams[stream.key]
+
+
+def _merge(streams, poll_interval):
+    """
+    yields the payloads of several attached streams as they are published,
+    waiting on one event that every stream's broadcaster sets
+    """
+    wake = threading.Event()
+    seqs = {stream: 0 for stream in streams}
+    for stream in streams:
+        stream.broadcaster.add_listener(wake)
+    # The latest payload of every running camera is sent straight away
+    wake.set()
+    try:
+        while streams:
+            wake.wait(poll_interval)
+            wake.clear()
+            for stream in streams:
+                seqs[stream], payload = stream.broadcaster.wait(seqs[stream], timeout=0)
+                if payload is not None:
+                    yield payload
+                elif stream.broadcaster.closed:
+                    return
+    finally:
+        for stream in streams:
+            stream.broadcaster.remove_listener(wake)
+            stream.detach()
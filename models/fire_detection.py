@@ -1,6 +1,9 @@
 from ultralytics import YOLO
 import cv2
 from .config_loader import load_config
+from .preprocess import stack
+from .model_export import weights_for
+from .track_ids import TrackIds
 
 class fire_detection():
     """
@@ -9,32 +12,73 @@ class fire_detection():
     Args:
     model_path: path to model.
     conf: minimum confidence to consider detection.
+    backend: pytorch, onnx, onnx_int8, openvino or openvino_int8.
     
     """
     def __init__(self, config=None):
         if config is None:
             config = load_config()
-        self.model = YOLO(config['fire_model'])
+        self.backend = config.get('backend', 'pytorch')
+        self.model = YOLO(weights_for(config['fire_model'], self.backend), task='detect')
+        # Exported models get square inputs, only PyTorch runs the rectangular ones
+        self.rect = self.backend == 'pytorch'
         self.confidence = config.get('fire_confidence', 0.85)
+        self.imgsz = config.get('fire_imgsz', 640)
+        # Track ids are kept per camera, so batches of several cameras number each on its own
+        self.track_ids = TrackIds()
 
-    def process(self,img,flag=True):
+    def process(self,img,flag=True,prepared=None,key=None):
         """
-        this function processes the cv2 frame and returns the
-        bounding boxes
+        this function processes the cv2 frame and returns
+        (found, bounding boxes, details), details holding the confidence,
+        class and track id of each box. prepared is an optional
+        PreparedFrame of img shared with the other models, used instead
+        of letterboxing again. key names the camera the frame comes from,
+        without it the track ids are None.
         """
         if not flag:
-            return (False,[])
+            return (False,[],[])
 
-        bb_boxes=[]
-        result=self.model(img,verbose=False)
+        if prepared is not None:
+            result=self.model(prepared.tensor,verbose=False)
+        else:
+            result=self.model(img,verbose=False)
+        return self._boxes(result[0],prepared,key)
+
+    def process_batch(self,imgs,prepared=None,keys=None):
+        """
+        this function runs the model once on a list of cv2 frames
+        and returns a (found, bounding boxes, details) tuple per frame.
+        keys names the camera of each frame.
+        """
+        if keys is None:
+            keys=[None]*len(imgs)
+        batch=stack(prepared) if prepared else None
+        if batch is None:
+            prepared=[None]*len(imgs)
+            results=self.model(imgs,verbose=False)
+        else:
+            results=self.model(batch,verbose=False)
+        return [self._boxes(result,p,key) for result,p,key in zip(results,prepared,keys)]
 
-        for box in result[0].boxes:
+    def _boxes(self,result,prepared=None,key=None):
+        bb_boxes=[]
+        details=[]
+        class_ids=[]
+        for box in result.boxes:
             if(float(box.conf[0])>self.confidence):
-                bb=list(map(int,box.xyxy[0]))
+                xyxy=box.xyxy[0] if prepared is None else prepared.to_frame(box.xyxy[0])
+                bb=list(map(int,xyxy))
                 bb_boxes.append(bb)
+                details.append({'confidence':round(float(box.conf[0]),3),'class':result.names[int(box.cls[0])]})
+                class_ids.append(int(box.cls[0]))
+
+        ids=self.track_ids.update(key,bb_boxes,[detail['confidence'] for detail in details],class_ids)
+        for detail,track_id in zip(details,ids):
+            detail['track_id']=track_id
 
         if(len(bb_boxes)):
             found=True
         else:
             found=False
-        return (found,bb_boxes)
\ No newline at end of file
+        return (found,bb_boxes,details)
\ No newline at end of file
@@ -0,0 +1,90 @@
+import threading
+import time
+import logging
+from collections import deque, namedtuple
+
+import cv2
+
+FramePacket = namedtuple('FramePacket', ['seq', 'timestamp', 'frame'])
+
+
+class FrameGrabber:
+    """
+    this class reads a cv2.VideoCapture on its own thread and keeps only
+    the newest frames, so a slow consumer never falls behind the camera.
+
+    Args:
+    cap: opened cv2.VideoCapture.
+    name: camera identifier used in log messages.
+    buffer_size: number of recent frames kept in the ring buffer.
+    """
+
+    def __init__(self, cap, name, buffer_size=2):
+        self.cap = cap
+        self.name = name
+        self.buffer = deque(maxlen=buffer_size)
+        self.captured = 0
+        self.consumed = 0
+        self.dropped = 0
+        self._last_seq = 0
+        self._ended = False
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"grabber-{name}", daemon=True)
+        # Keep OpenCV's own queue as short as the backend allows
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set() and self.cap.isOpened():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                with self._cond:
+                    self.captured += 1
+                    self.buffer.append(FramePacket(self.captured, time.time(), frame))
+                    self._cond.notify_all()
+        except Exception as e:
+            logging.error(f"Frame grabber for camera ID {self.name} failed: {e}")
+        finally:
+            with self._cond:
+                self._ended = True
+                self._cond.notify_all()
+
+    def read(self, timeout=5.0):
+        """
+        returns (packet, skipped) for the newest frame not yet consumed,
+        skipped being the number of frames dropped since the last read.
+        returns (None, 0) once the stream has ended or timed out.
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: (self.buffer and self.buffer[-1].seq > self._last_seq) or self._ended,
+                timeout
+            )
+            if not self.buffer or self.buffer[-1].seq <= self._last_seq:
+                return None, 0
+            packet = self.buffer[-1]
+            skipped = packet.seq - self._last_seq - 1
+            self._last_seq = packet.seq
+            self.consumed += 1
+            self.dropped += skipped
+            return packet, skipped
+
+    def stats(self):
+        with self._cond:
+            return {
+                'captured': self.captured,
+                'consumed': self.consumed,
+                'dropped': self.dropped,
+                'buffered': len(self.buffer),
+            }
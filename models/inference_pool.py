@@ -0,0 +1,220 @@
+import itertools
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from models.registry import ModelRegistry, build_detector
+
+
+
+def _worker_main(worker_id, slot_names, requests, results, model_config):
+    """
+    entry point of an inference worker process. frames are read in place
+    from the shared memory slots, only the small task tuple is pickled.
+    """
+    slots = [shared_memory.SharedMemory(name=slot_name) for slot_name in slot_names]
+    detectors = ModelRegistry(model_config)
+    pose_detectors = {}
+    try:
+        while True:
+            task = requests.get()
+            if task is None:
+                break
+            task_id, slot, shape, name, key, kwargs = task
+            try:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=slots[slot].buf)
+                if name == 'pose':
+                    if key not in pose_detectors:
+                        pose_detectors[key] = build_detector('pose', model_config)
+                    result = pose_detectors[key].detect_pose(frame)[0]
+                else:
+                    if name == 'people':
+                        result = detectors.get(name).process(frame, region=kwargs.get('region'), key=key)
+                    else:
+                        result = detectors.get(name).process(frame, key=key)
+                results.put((task_id, slot, True, result))
+            except Exception as e:
+                results.put((task_id, slot, False, f"{type(e).__name__}: {e}"))
+            finally:
+                # Drop the view before the slot is reused by the parent
+                frame = None
+    finally:
+        for shm in slots:
+            try:
+                shm.close()
+            except BufferError:
+                pass
+
+
+class InferencePool:
+    """
+    this class runs the detectors in separate worker processes so that
+    cameras are not limited to one GIL. frames travel through
+    multiprocessing.shared_memory slots instead of being pickled.
+    a worker that dies fails its pending frames, gives their slots back
+    and is replaced by a fresh one.
+
+    Args:
+    num_workers: number of worker processes.
+    model_config: detector configs keyed by 'people', 'fire' and 'gear'.
+    slots: number of shared frame slots, bounds the frames in flight.
+    frame_shape: largest frame shape a slot can hold.
+    start_method: multiprocessing start method, spawn if None. the pool is
+    started while camera threads run, forking them could copy a held lock.
+    restart_interval: least seconds between two restarts of the same worker.
+    """
+
+    def __init__(self, num_workers, model_config, slots=None, frame_shape=(720, 1280, 3), start_method=None,
+                 restart_interval=5.0):
+        self.num_workers = num_workers
+        self.restart_interval = restart_interval
+        self.frame_shape = tuple(frame_shape)
+        slot_bytes = int(np.prod(self.frame_shape))
+        slot_count = slots or num_workers * 4
+        self._slots = [shared_memory.SharedMemory(create=True, size=slot_bytes) for _ in range(slot_count)]
+        self._free = queue.Queue()
+        for index in range(slot_count):
+            self._free.put(index)
+        # task id -> (future, slot, worker index), guarded by _futures_lock as are the queues
+        self._futures = {}
+        self._futures_lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._round_robin = itertools.cycle(range(num_workers))
+        self._model_config = model_config
+        self._slot_names = [shm.name for shm in self._slots]
+        self._closing = False
+        self.restarts = 0
+
+        self._ctx = mp.get_context(start_method or 'spawn')
+        self._results = self._ctx.Queue()
+        self._requests = [None] * num_workers
+        self._workers = [None] * num_workers
+        self._started_at = [0.0] * num_workers
+        for index in range(num_workers):
+            self._spawn(index)
+        self._collector = threading.Thread(target=self._collect, name="inference-results", daemon=True)
+        self._collector.start()
+        logging.info(f"Inference pool started with {num_workers} workers and {slot_count} frame slots.")
+
+    def submit(self, name, frame, key=None, timeout=5.0, **kwargs):
+        """
+        copies frame into a free slot and queues it for detector name.
+        returns a Future resolving to the detector's result. tasks with a
+        key, the camera whose pose or track ids the worker keeps, always go
+        to the same worker.
+        """
+        if frame.nbytes > self._slots[0].size:
+            raise ValueError(f"Frame of shape {frame.shape} does not fit a {self.frame_shape} slot")
+        slot = self._free.get(timeout=timeout)
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._slots[slot].buf)
+        view[...] = frame
+
+        future = Future()
+        task_id = next(self._task_ids)
+        with self._futures_lock:
+            if key is not None:
+                worker = hash(key) % self.num_workers
+            else:
+                worker = next(self._round_robin)
+            self._futures[task_id] = (future, slot, worker)
+            self._requests[worker].put((task_id, slot, frame.shape, name, key, kwargs))
+        return future
+
+    def run(self, name, frame, key=None, timeout=10.0, **kwargs):
+        return self.submit(name, frame, key=key, **kwargs).result(timeout)
+
+    def _spawn(self, index):
+        """
+        starts worker index with a request queue of its own, a dead
+        worker's queue is dropped with the tasks left in it
+        """
+        self._requests[index] = self._ctx.Queue()
+        self._workers[index] = self._ctx.Process(
+            target=_worker_main, name=f"inference-{index}", daemon=True,
+            args=(index, self._slot_names, self._requests[index], self._results, self._model_config))
+        self._workers[index].start()
+        self._started_at[index] = time.monotonic()
+
+    def _collect(self, check_interval=1.0):
+        last_check = time.monotonic()
+        while True:
+            try:
+                message = self._results.get(timeout=check_interval)
+            except queue.Empty:
+                message = ()
+            except (EOFError, OSError):
+                break
+            if message is None:
+                break
+            if message:
+                task_id, _, ok, payload = message
+                with self._futures_lock:
+                    pending = self._futures.pop(task_id, None)
+                # Tasks of a dead worker have already been failed and their slots freed
+                if pending is not None:
+                    future, slot, _ = pending
+                    self._free.put(slot)
+                    if ok:
+                        future.set_result(payload)
+                    else:
+                        future.set_exception(RuntimeError(payload))
+            if time.monotonic() - last_check >= check_interval:
+                last_check = time.monotonic()
+                self._replace_dead_workers()
+
+    def _replace_dead_workers(self):
+        """
+        fails the frames queued to dead workers and restarts them, a worker
+        that keeps dying is restarted at most once per restart_interval
+        """
+        for index, worker in enumerate(self._workers):
+            if worker.is_alive():
+                continue
+            with self._futures_lock:
+                if self._closing:
+                    return
+                lost = {task_id: pending for task_id, pending in self._futures.items() if pending[2] == index}
+                for task_id in lost:
+                    del self._futures[task_id]
+                restart = time.monotonic() - self._started_at[index] >= self.restart_interval
+                if restart:
+                    self._spawn(index)
+                    self.restarts += 1
+            if restart:
+                logging.error(f"Inference worker {index} died with exit code {worker.exitcode}, restarted.")
+            for future, slot, _ in lost.values():
+                self._free.put(slot)
+                future.set_exception(RuntimeError(f"Inference worker {index} died"))
+
+    def stats(self):
+        with self._futures_lock:
+            in_flight = len(self._futures)
+        return {
+            'workers': self.num_workers,
+            'slots': len(self._slots),
+            'free_slots': self._free.qsize(),
+            'in_flight': in_flight,
+            'restarts': self.restarts,
+        }
+
+    def close(self):
+        with self._futures_lock:
+            if self._closing:
+                return
+            self._closing = True
+        for requests in self._requests:
+            requests.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5.0)
+        self._results.put(None)
+        self._collector.join(timeout=2.0)
+        for shm in self._slots:
+            shm.close()
+            shm.unlink()
+        logging.info("Inference pool stopped.")
@@ -0,0 +1,115 @@
+import gzip
+import os
+import queue
+import shutil
+import threading
+import time
+import logging
+import logging.handlers
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    this class rate-limits the records logged with extra={'throttle': key},
+    typically one key per camera, so an error repeated on every frame is
+    written a few times per second at most. each call site and key gets a
+    token bucket; the next record let through reports how many were
+    suppressed. records without a throttle key always pass.
+
+    Args:
+    rate: records per second let through once the burst is used up.
+    burst: records let through at once before the rate applies.
+    """
+
+    def __init__(self, rate=1.0, burst=5):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.suppressed = 0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, 'throttle', None)
+        if key is None:
+            return True
+        key = (record.pathname, record.lineno, key)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, dropped = self._buckets.get(key, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, dropped + 1)
+                self.suppressed += 1
+                return False
+            self._buckets[key] = (tokens - 1, now, 0)
+        if dropped:
+            record.msg = f"{record.msg} ({dropped} similar messages suppressed)"
+        return True
+
+
+def gzip_namer(name):
+    return name + '.gz'
+
+
+def gzip_rotator(source, dest):
+    """
+    compresses a rotated log file, runs on the listener thread
+    """
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _file_handler(path, level, max_bytes, backups, compress, formatter):
+    handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, delay=True)
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    if compress:
+        handler.namer = gzip_namer
+        handler.rotator = gzip_rotator
+    return handler
+
+
+def setup_logging(log_config=None):
+    """
+    this function routes every record of the root logger through a queue
+    to a listener thread, which writes them to the console, app.log and,
+    for ERROR and above, error.log. the log files rotate by size and the
+    rotated files are gzipped. callers only pay for putting the record on
+    the queue.
+
+    returns the started QueueListener, stop it at exit to flush the queue.
+    """
+    log_config = log_config or {}
+    level = logging.getLevelName(str(log_config.get('level', 'INFO')).upper())
+    max_bytes = int(log_config.get('max_mb', 10) * 1024 * 1024)
+    backups = log_config.get('backups', 5)
+    compress = log_config.get('compress', True)
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    handlers = [
+        console,
+        _file_handler(log_config.get('file', 'app.log'), level, max_bytes, backups, compress, formatter),
+        _file_handler(log_config.get('error_file', 'error.log'), logging.ERROR, max_bytes, backups, compress, formatter),
+    ]
+
+    # Unbounded, a burst of records never blocks the thread logging them
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(log_config.get('throttle_rate', 1.0), log_config.get('throttle_burst', 5)))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,314 @@
+import bisect
+import threading
+import time
+import logging
+
+# Upper bounds, in seconds, of the latency buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# A camera that has not produced a frame for this long is reported at 0 FPS
+FPS_STALE_AFTER = 5.0
+
+
+class Histogram:
+    """
+    this class counts observations into fixed latency buckets, so
+    recording one costs a bisect and a few additions whatever the traffic.
+
+    Args:
+    buckets: sorted upper bounds in seconds, an overflow bucket is added.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def copy(self):
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        histogram.max = self.max
+        return histogram
+
+    def quantile(self, q):
+        """
+        estimates the q quantile by interpolating inside its bucket
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'avg_ms': round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.5) * 1000, 3),
+            'p95_ms': round(self.quantile(0.95) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class CameraMetrics:
+    """
+    per-camera stage histograms, frame counters and an exponentially
+    weighted frame rate
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.frames = 0
+        self.dropped = 0
+        self.interval = None
+        self.last_frame = None
+        self.sources = {}
+
+    def fps(self, now):
+        if not self.interval or now - self.last_frame > FPS_STALE_AFTER:
+            return 0.0
+        return 1.0 / self.interval
+
+
+class _Timer:
+    __slots__ = ('metrics', 'stage', 'camera', 'start')
+
+    def __init__(self, metrics, stage, camera):
+        self.metrics = metrics
+        self.stage = stage
+        self.camera = camera
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start, self.camera)
+        return False
+
+
+class Metrics:
+    """
+    this class collects per-camera, per-stage latency histograms, frame
+    rates and dropped frames, plus the stats() of the app's queues and
+    workers, and renders them as Prometheus text or a JSON summary.
+    cameras are keyed by (user_id, Cam_id) and only reported between
+    start() and remove(), so stopped cameras leave no stale series;
+    stages recorded without a camera, such as db, are global.
+
+    Args:
+    buckets: latency bucket upper bounds in seconds.
+    enabled: when False every recording call returns at once.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, enabled=True):
+        self.buckets = tuple(sorted(buckets))
+        self.enabled = enabled
+        self._cameras = {}
+        self._stages = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def start(self, camera):
+        """
+        starts reporting camera with fresh counters and returns the handle
+        to pass to remove()
+        """
+        with self._lock:
+            metrics = self._cameras[camera] = CameraMetrics()
+        return metrics
+
+    def remove(self, camera, handle=None):
+        """
+        stops reporting camera, unless a newer worker of the same camera
+        has started since handle was returned
+        """
+        with self._lock:
+            if handle is None or self._cameras.get(camera) is handle:
+                self._cameras.pop(camera, None)
+
+    def observe(self, stage, seconds, camera=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            if camera is None:
+                stages = self._stages
+            elif camera in self._cameras:
+                stages = self._cameras[camera].stages
+            else:
+                # Late timings of a removed camera, e.g. a viewer encoding its last frame
+                return
+            histogram = stages.get(stage)
+            if histogram is None:
+                histogram = stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def timer(self, stage, camera=None):
+        """
+        context manager recording the time spent in its block under stage
+        """
+        return _Timer(self, stage, camera)
+
+    def frame(self, camera, dropped=0):
+        """
+        counts one processed frame of camera and the frames dropped before it
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            metrics = self._cameras.get(camera)
+            if metrics is None:
+                return
+            metrics.frames += 1
+            metrics.dropped += dropped
+            if metrics.last_frame is not None:
+                interval = now - metrics.last_frame
+                metrics.interval = interval if metrics.interval is None else 0.9 * metrics.interval + 0.1 * interval
+            metrics.last_frame = now
+
+    def watch(self, name, stats_fn, camera=None):
+        """
+        reports stats_fn() under name, per started camera when camera is
+        given, until unwatch or remove is called
+        """
+        with self._lock:
+            if camera is None:
+                self._collectors[name] = stats_fn
+            elif camera in self._cameras:
+                self._cameras[camera].sources[name] = stats_fn
+
+    def unwatch(self, name, camera=None):
+        with self._lock:
+            if camera is None:
+                self._collectors.pop(name, None)
+            elif camera in self._cameras:
+                self._cameras[camera].sources.pop(name, None)
+
+    def _collect(self, sources):
+        results = {}
+        for name, stats_fn in sources.items():
+            try:
+                results[name] = stats_fn()
+            except Exception as e:
+                logging.error(f"Collecting {name} metrics failed: {e}")
+        return results
+
+    def _snapshot(self, user_id):
+        """
+        copies the counters under the lock, the stats() callbacks run outside of it.
+        with a user_id only that user's cameras are included: global stages and
+        components describe every user's traffic.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cameras = {
+                key: (cam.fps(now), cam.frames, cam.dropped,
+                      {stage: histogram.copy() for stage, histogram in cam.stages.items()}, dict(cam.sources))
+                for key, cam in self._cameras.items() if user_id is None or key[0] == user_id
+            }
+            if user_id is None:
+                stages = {stage: histogram.copy() for stage, histogram in self._stages.items()}
+                collectors = dict(self._collectors)
+            else:
+                stages, collectors = {}, {}
+        cameras = {key: (fps, frames, dropped, histograms, self._collect(sources))
+                   for key, (fps, frames, dropped, histograms, sources) in cameras.items()}
+        return cameras, stages, self._collect(collectors)
+
+    def summary(self, user_id=None):
+        """
+        JSON-serialisable summary, only the cameras of user_id when given
+        """
+        cameras, stages, components = self._snapshot(user_id)
+        return {
+            'cameras': {
+                f"{key[0]}/{key[1]}": dict(
+                    {'user_id': key[0], 'camera': key[1], 'fps': round(fps, 2), 'frames': frames, 'dropped': dropped,
+                     'stages': {stage: histogram.summary() for stage, histogram in histograms.items()}},
+                    **sources
+                )
+                for key, (fps, frames, dropped, histograms, sources) in cameras.items()
+            },
+            'stages': {stage: histogram.summary() for stage, histogram in stages.items()},
+            'components': components,
+        }
+
+    def prometheus(self, user_id=None, prefix='indshield'):
+        """
+        Prometheus text exposition format, version 0.0.4
+        """
+        cameras, stages, components = self._snapshot(user_id)
+        # family name -> (type, samples), rendered in name order with one TYPE line each
+        families = {}
+
+        def add(family, kind, labels, value, suffix=''):
+            text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            name = f"{prefix}_{family}{suffix}"
+            families.setdefault(f"{prefix}_{family}", (kind, []))[1].append(
+                f"{name}{{{text}}} {float(value):g}" if text else f"{name} {float(value):g}")
+
+        def add_histogram(labels, stage, histogram):
+            labels = dict(labels, stage=stage)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                add('stage_seconds', 'histogram', dict(labels, le=le), cumulative, '_bucket')
+            add('stage_seconds', 'histogram', labels, histogram.sum, '_sum')
+            add('stage_seconds', 'histogram', labels, histogram.count, '_count')
+
+        def add_stats(name, labels, stats):
+            for key, value in stats.items():
+                if isinstance(value, dict):
+                    for sub_key, sub_value in value.items():
+                        if isinstance(sub_value, (int, float)):
+                            add(f"{name}_{_metric_name(sub_key)}", 'gauge', dict(labels, name=key), sub_value)
+                elif isinstance(value, (int, float)):
+                    add(f"{name}_{_metric_name(key)}", 'gauge', labels, value)
+
+        for (owner, camera), (fps, frames, dropped, histograms, sources) in cameras.items():
+            labels = {'user': owner, 'camera': camera}
+            add('frames_total', 'counter', labels, frames)
+            add('dropped_frames_total', 'counter', labels, dropped)
+            add('fps', 'gauge', labels, fps)
+            for stage, histogram in histograms.items():
+                add_histogram(labels, stage, histogram)
+            for name, stats in sources.items():
+                add_stats(_metric_name(name), labels, stats)
+        for stage, histogram in stages.items():
+            add_histogram({}, stage, histogram)
+        for name, stats in components.items():
+            add_stats(_metric_name(name), {}, stats)
+
+        lines = []
+        for family in sorted(families):
+            kind, samples = families[family]
+            lines.append(f"# TYPE {family} {kind}")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _metric_name(name):
+    return ''.join(c if c.isalnum() else '_' for c in str(name)).lower()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,102 @@
+"""
+Export the YOLO weights named in config.yaml to CPU-friendly formats.
+
+Usage: python -m models.model_export [--backends onnx onnx_int8 openvino openvino_int8]
+                                     [--fire-data fire.yaml] [--gear-data gear.yaml] [--people-data coco128.yaml]
+
+openvino_int8 is calibrated on each model's own dataset yaml. The people
+model is COCO trained and falls back to coco128.yaml, the fire and gear
+models are skipped for openvino_int8 unless their dataset is given.
+
+The detectors pick the exported files up through the `backend` key of
+config.yaml, see weights_for().
+"""
+import argparse
+import logging
+import os
+
+from .config_loader import load_config
+
+BACKENDS = ('pytorch', 'onnx', 'onnx_int8', 'openvino', 'openvino_int8')
+
+# Calibration dataset used when none is given, only the people model is trained on COCO
+DEFAULT_DATA = {'people_model': 'coco128.yaml'}
+
+
+def weights_for(path, backend='pytorch'):
+    """
+    this function returns where the export of the .pt weights at path
+    for backend lives, e.g. models/fire.pt -> models/fire_int8.onnx
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, expected one of {BACKENDS}")
+    stem, _ = os.path.splitext(path)
+    return {
+        'pytorch': path,
+        'onnx': f"{stem}.onnx",
+        'onnx_int8': f"{stem}_int8.onnx",
+        'openvino': f"{stem}_openvino_model",
+        'openvino_int8': f"{stem}_int8_openvino_model",
+    }[backend]
+
+
+def export(path, backend, imgsz=640, data=None):
+    """
+    this function exports the .pt weights at path for backend and
+    returns the location of the result. openvino_int8 needs data, the
+    dataset yaml of the classes the weights were trained on.
+    """
+    from ultralytics import YOLO
+
+    target = weights_for(path, backend)
+    if backend == 'pytorch':
+        return target
+    if backend == 'onnx':
+        # Dynamic axes keep cross-camera batches and rectangular inputs working
+        return YOLO(path).export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True)
+    if backend == 'onnx_int8':
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        source = weights_for(path, 'onnx')
+        if not os.path.exists(source):
+            export(path, 'onnx', imgsz)
+        quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+        return target
+    if backend == 'openvino':
+        return YOLO(path).export(format='openvino', imgsz=imgsz, dynamic=True)
+    # INT8 post-training quantization with NNCF, calibrated on a dataset yaml
+    if data is None:
+        raise ValueError(f"openvino_int8 needs the dataset {path} was trained on to calibrate")
+    return YOLO(path).export(format='openvino', imgsz=imgsz, int8=True, data=data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the detector weights for CPU runtimes.")
+    parser.add_argument('--backends', nargs='+', default=['onnx', 'onnx_int8'], choices=BACKENDS[1:])
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--fire-data', help="dataset yaml used to calibrate the fire model for openvino_int8")
+    parser.add_argument('--gear-data', help="dataset yaml used to calibrate the gear model for openvino_int8")
+    parser.add_argument('--people-data', default=DEFAULT_DATA['people_model'],
+                        help="dataset yaml used to calibrate the people model for openvino_int8")
+    parser.add_argument('--config', help="config.yaml to read the weight paths from")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = load_config(args.config)
+    for key in ('fire_model', 'gear_model', 'people_model'):
+        data = getattr(args, key.replace('_model', '_data'))
+        for backend in args.backends:
+            if backend == 'openvino_int8' and data is None:
+                option = '--' + key.replace('_model', '-data')
+                logging.warning(f"Skipping openvino_int8 for {config[key]}: pass its dataset yaml with {option}, "
+                                f"calibrating on COCO images would quantize it for the wrong classes")
+                continue
+            try:
+                location = export(config[key], backend, args.imgsz, data)
+                logging.info(f"Exported {config[key]} for {backend}: {location}")
+            except Exception as e:
+                logging.error(f"Exporting {config[key]} for {backend} failed: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import time
+
+import cv2
+
+
+class MotionGate:
+    """
+    this class decides whether a frame is worth running the detectors on,
+    by comparing a small grey copy of it with the last frame that was
+    inferred. static scenes are skipped until the forced recheck interval.
+
+    Args:
+    sensitivity: fraction of changed pixels (0-1) that counts as motion.
+    pixel_threshold: grey level difference for a pixel to count as changed.
+    max_interval: seconds after which a full check is forced anyway.
+    size: (width, height) the frames are downscaled to.
+    """
+
+    def __init__(self, sensitivity=0.01, pixel_threshold=25, max_interval=5.0, size=(160, 90)):
+        self.sensitivity = sensitivity
+        self.pixel_threshold = pixel_threshold
+        self.max_interval = max_interval
+        self.size = size
+        self.reference = None
+        self.last_run = 0.0
+        self.checked = 0
+        self.skipped = 0
+
+    def _small(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+    def should_run(self, frame):
+        """
+        returns True if the detectors should run on this frame
+        """
+        small = self._small(frame)
+        now = time.monotonic()
+        run = self.reference is None or now - self.last_run >= self.max_interval
+        if not run:
+            diff = cv2.absdiff(small, self.reference)
+            changed = cv2.countNonZero(cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+            run = changed >= self.sensitivity * diff.size
+
+        if run:
+            self.reference = small
+            self.last_run = now
+            self.checked += 1
+        else:
+            self.skipped += 1
+        return run
+
+    @property
+    def skip_ratio(self):
+        total = self.checked + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def stats(self):
+        return {
+            'checked': self.checked,
+            'skipped': self.skipped,
+            'skip_ratio': round(self.skip_ratio, 4),
+        }
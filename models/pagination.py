@@ -0,0 +1,23 @@
+from datetime import datetime
+
+
+def make_cursor(date_time, row_id):
+    """
+    this function returns the <date_time>_<id> keyset pagination cursor
+    of a row, the ?before= value of the page after it
+    """
+    return f"{date_time.isoformat()}_{row_id}"
+
+
+def parse_cursor(value):
+    """
+    this function parses a <date_time>_<id> pagination cursor, None if
+    missing or invalid
+    """
+    if not value:
+        return None
+    date_time, _, row_id = value.rpartition('_')
+    try:
+        return datetime.fromisoformat(date_time), int(row_id)
+    except ValueError:
+        return None
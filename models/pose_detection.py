@@ -39,8 +39,22 @@ class PoseEmergencyDetector:
     def process_frame(self, frame, alert_callback):
         alert, processed_frame = self.detect_pose(frame)
         if alert:
-            cv2.putText(processed_frame, "EMERGENCY DETECTED!", (50, 50), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-            cv2.rectangle(processed_frame, (10, 10), (frame.shape[1]-10, frame.shape[0]-10), (0, 0, 255), 5)
-            alert_callback({"frame": processed_frame, "bbox": (10, 10, frame.shape[1]-10, frame.shape[0]-10)})
+            self.mark_alert(processed_frame, alert_callback)
         return processed_frame
+
+    @staticmethod
+    def alert_box(frame):
+        return (10, 10, frame.shape[1]-10, frame.shape[0]-10)
+
+    @staticmethod
+    def draw_alert(frame):
+        cv2.putText(frame, "EMERGENCY DETECTED!", (50, 50), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+        x1, y1, x2, y2 = PoseEmergencyDetector.alert_box(frame)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 5)
+        return frame
+
+    @staticmethod
+    def mark_alert(frame, alert_callback):
+        PoseEmergencyDetector.draw_alert(frame)
+        alert_callback({"frame": frame, "bbox": PoseEmergencyDetector.alert_box(frame)})
@@ -0,0 +1,72 @@
+import threading
+
+import numpy as np
+
+
+class PreparedFrame:
+    """
+    this class holds the model input built from one frame: a 1x3xHxW
+    float RGB tensor letterboxed exactly like Ultralytics does it, plus
+    what is needed to map boxes back to the frame.
+
+    Args:
+    frame: cv2 BGR frame.
+    imgsz: model input size.
+    stride: model stride, the padded shape is a multiple of it.
+    auto: pad only up to the stride (rectangular), else to a square imgsz.
+    """
+
+    def __init__(self, frame, imgsz=640, stride=32, auto=True):
+        # Imported here so that importing this module stays cheap at startup
+        import torch
+        from ultralytics.data.augment import LetterBox
+
+        self.orig_shape = frame.shape[:2]
+        img = LetterBox(imgsz, auto=auto, stride=stride)(image=frame)
+        self.shape = img.shape[:2]
+        img = np.ascontiguousarray(img[..., ::-1].transpose(2, 0, 1)[None])
+        self.tensor = torch.from_numpy(img).float() / 255.0
+
+    def to_frame(self, xyxy):
+        """
+        maps a box from tensor coordinates back to the original frame
+        """
+        from ultralytics.utils.ops import scale_boxes
+
+        box = scale_boxes(self.shape, xyxy.reshape(1, 4).clone().float(), self.orig_shape)
+        return box[0]
+
+
+class FramePreprocessor:
+    """
+    this class builds the input tensor of a frame once per input size
+    and hands the same PreparedFrame to every detector that asks for it.
+    safe to use from the concurrent detection stages of one frame.
+    """
+
+    def __init__(self, frame, stride=32):
+        self.frame = frame
+        self.stride = stride
+        self.built = 0
+        self._prepared = {}
+        self._lock = threading.Lock()
+
+    def get(self, imgsz=640, auto=True):
+        key = (imgsz, auto)
+        with self._lock:
+            if key not in self._prepared:
+                self._prepared[key] = PreparedFrame(self.frame, imgsz, self.stride, auto)
+                self.built += 1
+            return self._prepared[key]
+
+
+def stack(prepared):
+    """
+    joins the tensors of several PreparedFrames into one batch,
+    returns None when their shapes differ.
+    """
+    import torch
+
+    if len({p.shape for p in prepared}) != 1:
+        return None
+    return torch.cat([p.tensor for p in prepared])
@@ -1,6 +1,10 @@
 from ultralytics import YOLO
 import cv2
 from .config_loader import load_config
+from .preprocess import stack
+from .model_export import weights_for
+from .zones import ZoneMask, parse_zones
+from .track_ids import TrackIds
 
 class people_detection():
     """
@@ -9,78 +13,158 @@ class people_detection():
 
     Args:
     model_path: path to model
-    region: list containg regoin coordinates.
+    region: polygon zones, as JSON text or a list of polygons.
     conf: minimum confidence to consider detection 
+    backend: pytorch, onnx, onnx_int8, openvino or openvino_int8.
     
     """
 
     def __init__(self, config=None):
         if config is None:
             config = load_config()
-        self.model = YOLO(config['people_model'], verbose=False)
+        self.backend = config.get('backend', 'pytorch')
+        self.model = YOLO(weights_for(config['people_model'], self.backend), task='detect', verbose=False)
+        # Exported models get square inputs, only PyTorch runs the rectangular ones
+        self.rect = self.backend == 'pytorch'
         self.conf = config.get('people_confidence', 0.45)
         self.region = config.get('people_region', None)
+        self.imgsz = config.get('people_imgsz', 640)
+        self.roi = config.get('people_roi', True)
+        self.roi_margin = config.get('people_roi_margin', 32)
+        self.anchor = config.get('people_zone_anchor', 'center')
+        self._zones = {}
+        # Track ids are kept per camera, so batches of several cameras number each on its own
+        self.track_ids = TrackIds()
 
-    def in_region(self, point):
+    def zones(self, region, shape):
         """
-        this function checks if the given point is in the region
+        this function returns the ZoneMask of region for frames of the
+        given shape, rasterised once and then reused.
         """
-        x, y = point
-        # Extracting the region points
-        x1, y1 = self.region[0]
-        x2, y2 = self.region[1]
-        x3, y3 = self.region[2]
-        x4, y4 = self.region[3]
+        if isinstance(region, ZoneMask):
+            return region
+        key = (region if isinstance(region, str) else repr(region), tuple(shape[:2]))
+        # Camera threads share the cache unlocked: one read, and the new mask is returned
+        # from a local, so a clear() by another thread cannot lose it
+        zones = self._zones.get(key)
+        if zones is None:
+            zones = ZoneMask(region, shape)
+            if len(self._zones) >= 64:
+                self._zones.clear()
+            self._zones[key] = zones
+        return zones
 
-        # Calculating vectors from point to vertices of the region
-        vec1 = (x2 - x1, y2 - y1)
-        vec2 = (x3 - x2, y3 - y2)
-        vec3 = (x4 - x3, y4 - y3)
-        vec4 = (x1 - x4, y1 - y4)
-
-        # Calculating vectors from point to edges of the region
-        edge1 = (x - x1, y - y1)
-        edge2 = (x - x2, y - y2)
-        edge3 = (x - x3, y - y3)
-        edge4 = (x - x4, y - y4)
+    def crop(self, img, region):
+        """
+        this function crops the frame to the bounding rectangle of the
+        region plus a margin and returns (crop, (x offset, y offset)).
+        the whole frame is returned when there is nothing to crop.
+        """
+        if not self.roi or not region:
+            return img, (0, 0)
+        zones = self.zones(region, img.shape)
+        if not zones:
+            return img, (0, 0)
+        h, w = img.shape[:2]
+        zx1, zy1, zx2, zy2 = zones.bounds
+        x1 = max(zx1 - self.roi_margin, 0)
+        y1 = max(zy1 - self.roi_margin, 0)
+        x2 = min(zx2 + self.roi_margin, w)
+        y2 = min(zy2 + self.roi_margin, h)
+        if x2 <= x1 or y2 <= y1 or (x2 - x1) * (y2 - y1) >= w * h:
+            return img, (0, 0)
+        return img[y1:y2, x1:x2], (x1, y1)
 
-        # Checking if the point is on the correct side of all edges
-        cross1 = vec1[0] * edge1[1] - vec1[1] * edge1[0]
-        cross2 = vec2[0] * edge2[1] - vec2[1] * edge2[0]
-        cross3 = vec3[0] * edge3[1] - vec3[1] * edge3[0]
-        cross4 = vec4[0] * edge4[1] - vec4[1] * edge4[0]
+    def will_crop(self, img, region):
+        """
+        this function tells whether process() passes only a crop of img
+        to the model, in which case a full-frame tensor is of no use.
+        """
+        return self.crop(img, region)[0] is not img
 
-        # If all cross products have the same sign, the point is inside the region
-        return ((cross1 >= 0 and cross2 >= 0 and cross3 >= 0 and cross4 >= 0) or 
-               (cross1 <= 0 and cross2 <= 0 and cross3 <= 0 and cross4 <= 0))
+    def in_region(self, point, region=None):
+        """
+        this function checks if the given point is in any zone of the region
+        """
+        if region is None:
+            region = self.region
+        polygons = region.polygons if isinstance(region, ZoneMask) else parse_zones(region)
+        return any(cv2.pointPolygonTest(polygon, (float(point[0]), float(point[1])), False) >= 0
+                   for polygon in polygons)
 
-    
-    def process(self,img,region=False,flag=True):
+    def process(self,img,region=False,flag=True,prepared=None,key=None):
         """
-        this function processes the cv2 frame and returns the
-        bounding boxes
+        this function processes the cv2 frame and returns
+        (found, bounding boxes, details), details holding the confidence,
+        class and track id of each box. prepared is an optional
+        PreparedFrame of img shared with the other models, used instead
+        of letterboxing again.
+        with a region only the area around it is passed to the model.
+        key names the camera the frame comes from, without it the track
+        ids are None.
         """
         self.region=region
         if not flag:
-            return (False,[])
+            return (False,[],[])
 
-        bb_boxes=[]
-        results=self.model.track(img,verbose=False)
+        roi,offset=self.crop(img,self.region)
+        if roi is not img:
+            # The shared tensor covers the whole frame, the crop needs its own
+            prepared=None
+        if prepared is not None:
+            results=self.model(prepared.tensor,classes=[0],verbose=False)
+        else:
+            results=self.model(roi,classes=[0],verbose=False)
+        return self._boxes(results[0],self.region,img.shape,prepared,offset,key)
+
+    def process_batch(self,imgs,regions,prepared=None,keys=None):
+        """
+        this function runs the model once on a list of cv2 frames, each
+        with its own region, and returns a (found, bounding boxes, details) tuple
+        per frame. keys names the camera of each frame, whose track ids
+        are kept apart from the other cameras in the batch.
+        """
+        if keys is None:
+            keys=[None]*len(imgs)
+        crops=[self.crop(img,region) for img,region in zip(imgs,regions)]
+        offsets=[offset for _,offset in crops]
+        cropped=any(roi is not img for (roi,_),img in zip(crops,imgs))
+        batch=stack(prepared) if prepared and not cropped else None
+        if batch is None:
+            prepared=[None]*len(imgs)
+            results=self.model([roi for roi,_ in crops],classes=[0],verbose=False)
+        else:
+            results=self.model(batch,classes=[0],verbose=False)
+        return [self._boxes(result,region,img.shape,p,offset,key)
+                for result,region,img,p,offset,key in zip(results,regions,imgs,prepared,offsets,keys)]
 
-        for box in results[0].boxes:
+    def _boxes(self,result,region,shape,prepared=None,offset=(0,0),key=None):
+        bb_boxes=[]
+        details=[]
+        class_ids=[]
+        for box in result.boxes:
             if (int(box.cls[0])==0 and float(box.conf[0])>self.conf):
-                bb=list(map(int,box.xyxy[0]))
-                
-                if self.region:
-                    center=[(bb[0]+bb[2])//2,(bb[1]+bb[3])//2]
+                xyxy=box.xyxy[0] if prepared is None else prepared.to_frame(box.xyxy[0])
+                bb=list(map(int,xyxy))
+                bb_boxes.append([bb[0]+offset[0],bb[1]+offset[1],bb[2]+offset[0],bb[3]+offset[1]])
+                details.append({'confidence':round(float(box.conf[0]),3),'class':result.names[int(box.cls[0])]})
+                class_ids.append(int(box.cls[0]))
+
+        # Ids are given before the zone test, so a person keeps theirs across leaving and re-entering it
+        ids=self.track_ids.update(key,bb_boxes,[detail['confidence'] for detail in details],class_ids)
+        for detail,track_id in zip(details,ids):
+            detail['track_id']=track_id
 
-                    if(self.in_region(center)):
-                        bb_boxes.append(bb)
-                else:
-                    bb_boxes.append(bb)
+        if region and bb_boxes:
+            # All boxes are tested against the zone mask in one lookup
+            zones=self.zones(region,shape)
+            if zones:
+                inside=zones.boxes_inside(bb_boxes,self.anchor)
+                bb_boxes=[bb for bb,keep in zip(bb_boxes,inside) if keep]
+                details=[detail for detail,keep in zip(details,inside) if keep]
         
         if(len(bb_boxes)):
             found=True
         else:
             found=False
-        return (found,bb_boxes)
\ No newline at end of file
+        return (found,bb_boxes,details)
\ No newline at end of file
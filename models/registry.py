@@ -0,0 +1,73 @@
+import threading
+import time
+import logging
+
+
+def build_detector(name, model_config):
+    """
+    this function builds the detector called name. the heavy imports
+    (ultralytics, torch, mediapipe) only happen here.
+    """
+    if name == 'people':
+        from models.r_zone import people_detection
+        return people_detection(model_config['people'])
+    if name == 'fire':
+        from models.fire_detection import fire_detection
+        return fire_detection(model_config['fire'])
+    if name == 'gear':
+        from models.gear_detection import gear_detection
+        return gear_detection(model_config['gear'])
+    if name == 'pose':
+        from models.pose_detection import PoseEmergencyDetector
+        return PoseEmergencyDetector()
+    raise ValueError(f"Unknown detector {name}")
+
+
+class ModelRegistry:
+    """
+    this class loads each detector the first time a camera needs it and
+    then shares that instance between all cameras.
+
+    Args:
+    model_config: detector configs keyed by 'people', 'fire' and 'gear'.
+    """
+
+    def __init__(self, model_config):
+        self.model_config = model_config
+        self.load_times = {}
+        self._models = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        # Per-model lock: a slow load does not hold up the other models
+        with lock:
+            if name not in self._models:
+                start = time.perf_counter()
+                self._models[name] = build_detector(name, self.model_config)
+                self.load_times[name] = time.perf_counter() - start
+                logging.info(f"Loaded {name} model in {self.load_times[name]:.2f}s.")
+        return self._models[name]
+
+    def loaded(self):
+        return sorted(self._models)
+
+    def prewarm(self, names):
+        """
+        loads the given models on a background thread and returns it
+        """
+        def run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logging.error(f"Pre-warming {name} model failed: {e}")
+
+        thread = threading.Thread(target=run, name="model-prewarm", daemon=True)
+        thread.start()
+        return thread
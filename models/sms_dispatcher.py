@@ -0,0 +1,211 @@
+import json
+import threading
+import time
+import logging
+
+
+class TwilioBackend:
+    """
+    this class sends SMS through Twilio.
+
+    Args:
+    client_factory: callable returning a twilio Client, called on each send.
+    from_number: Twilio number the messages are sent from.
+    """
+
+    name = 'twilio'
+
+    def __init__(self, client_factory, from_number):
+        self.client_factory = client_factory
+        self.from_number = from_number
+
+    def send(self, to, body):
+        message = self.client_factory().messages.create(body=body, from_=self.from_number, to=to)
+        return message.sid
+
+
+class LocalBackend:
+    """
+    this class stands in for Twilio in development and tests: messages
+    are logged, kept in memory and, with a path, appended to a JSON lines file.
+    """
+
+    name = 'local'
+
+    def __init__(self, path=None):
+        self.path = path
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, to, body):
+        record = {'to': to, 'body': body, 'time': time.time()}
+        with self._lock:
+            self.sent.append(record)
+            if self.path:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+        logging.info(f"SMS to {to} (local backend): {body}")
+        return f"local-{len(self.sent)}"
+
+
+class SmsDispatcher:
+    """
+    this class sends alert SMS from a background thread. notify() returns
+    at once; the first alert of a type goes out straight away and further
+    ones arriving within the coalescing window become one follow-up
+    message, each recipient gets at most one message per rate_limit
+    seconds, and failed sends are retried with exponential backoff.
+
+    Args:
+    backend: object with send(to, body) -> message id.
+    recipients: phone numbers every alert goes to.
+    window: seconds after a message during which alerts of its type are gathered.
+    rate_limit: minimum seconds between two messages to one recipient.
+    max_retries: sends attempted again after a failure before giving up.
+    backoff: seconds before the first retry, doubled on each further one.
+    """
+
+    def __init__(self, backend, recipients, window=30.0, rate_limit=300.0, max_retries=3, backoff=2.0):
+        self.backend = backend
+        self.recipients = [r for r in recipients if r]
+        self.window = window
+        self.rate_limit = rate_limit
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.notified = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.failed = 0
+        self._pending = {}
+        self._last_sent = {}
+        self._type_sent = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        # Started by the first alert, processes that only import the app run no dispatcher
+        self._thread = None
+
+    def notify(self, alert_type, body):
+        """
+        queues an alert message for every recipient, never blocks on the network
+        """
+        now = time.monotonic()
+        with self._cond:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name="sms-dispatcher", daemon=True)
+                self._thread.start()
+            self.notified += 1
+            for recipient in self.recipients:
+                key = (recipient, alert_type)
+                entry = self._pending.get(key)
+                if entry:
+                    entry['count'] += 1
+                else:
+                    due = max(now, self._type_sent.get(key, float('-inf')) + self.window)
+                    self._pending[key] = {'body': body, 'count': 1, 'due': due, 'attempts': 0}
+            self._cond.notify()
+
+    def stop(self, timeout=5.0):
+        """
+        stops the dispatcher once the messages still waiting for their
+        window, rate limit or retry have been sent, one attempt each
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def _next_due(self, now):
+        """
+        pops the entries that may be sent now; entries of rate-limited
+        recipients are pushed back to when they may be sent.
+        """
+        ready = []
+        for key, entry in list(self._pending.items()):
+            if entry['due'] > now:
+                continue
+            allowed_at = self._last_sent.get(key[0], float('-inf')) + self.rate_limit
+            if allowed_at > now:
+                entry['due'] = allowed_at
+                continue
+            entry = self._pending.pop(key)
+            # Reserve the recipient's slot, a second alert type waits for the next one
+            entry['previous_sent'] = self._last_sent.get(key[0])
+            self._last_sent[key[0]] = now
+            self._type_sent[key] = now
+            ready.append((key, entry))
+        return ready
+
+    def _run(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                ready = self._next_due(now)
+                if not ready:
+                    if self._stopping:
+                        break
+                    timeout = min((entry['due'] for entry in self._pending.values()), default=now + 1.0) - now
+                    self._cond.wait(timeout=max(timeout, 0.01))
+                    continue
+            for key, entry in ready:
+                self._send(key, entry)
+        self._flush()
+
+    def _flush(self):
+        with self._cond:
+            remaining = list(self._pending.items())
+            self._pending.clear()
+        if remaining:
+            logging.info(f"Sending {len(remaining)} waiting SMS before stopping.")
+        for key, entry in remaining:
+            # A failure gives up at once instead of waiting for a retry
+            entry['attempts'] = self.max_retries
+            entry['previous_sent'] = self._last_sent.get(key[0])
+            self._send(key, entry)
+
+    def _send(self, key, entry):
+        recipient, alert_type = key
+        body = entry['body']
+        if entry['count'] > 1:
+            body = f"{body} ({entry['count']} alerts)"
+        try:
+            sid = self.backend.send(recipient, body)
+            self.sent += 1
+            self.coalesced += entry['count'] - 1
+            logging.info(f"SMS sent successfully. Message SID: {sid}")
+        except Exception as e:
+            with self._cond:
+                # The slot was not used, the retry only waits for its backoff
+                if entry['previous_sent'] is None:
+                    self._last_sent.pop(recipient, None)
+                else:
+                    self._last_sent[recipient] = entry['previous_sent']
+                entry['attempts'] += 1
+                if entry['attempts'] > self.max_retries:
+                    self.failed += 1
+                    logging.error(f"Error sending SMS to {recipient}, giving up: {e}")
+                    return
+                self.retried += 1
+                delay = self.backoff * 2 ** (entry['attempts'] - 1)
+                logging.error(f"Error sending SMS to {recipient}, retrying in {delay:.1f}s: {e}")
+                newer = self._pending.get(key)
+                if newer:
+                    entry['count'] += newer['count']
+                entry['due'] = time.monotonic() + delay
+                self._pending[key] = entry
+                self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            'backend': self.backend.name,
+            'recipients': len(self.recipients),
+            'pending': pending,
+            'notified': self.notified,
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'retried': self.retried,
+            'failed': self.failed,
+        }
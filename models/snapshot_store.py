@@ -0,0 +1,210 @@
+import hashlib
+import os
+import re
+import tempfile
+
+import cv2
+
+# <sha256 hex><extension>, e.g. 9f86d0...0f00a08.jpg
+REF_PATTERN = re.compile(r'^[0-9a-f]{64}(\.[0-9a-z]{1,8})?$')
+EXT_PATTERN = re.compile(r'^\.[0-9a-z]{1,8}$')
+
+# Extensions that may be displayed in the browser, each served only as this mimetype.
+# Anything else (html, svg, js, ...) is sent as a download
+INLINE_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.bmp': 'image/bmp',
+    '.pdf': 'application/pdf',
+    '.mp4': 'video/mp4',
+    '.webm': 'video/webm',
+    '.ogg': 'video/ogg',
+    '.mov': 'video/quicktime',
+}
+
+
+# Leading bytes of the inline types, for files stored without their name
+SIGNATURES = (
+    (0, b'\xff\xd8\xff', '.jpg'),
+    (0, b'\x89PNG\r\n\x1a\n', '.png'),
+    (0, b'GIF87a', '.gif'),
+    (0, b'GIF89a', '.gif'),
+    (8, b'WEBP', '.webp'),
+    (0, b'BM', '.bmp'),
+    (0, b'%PDF-', '.pdf'),
+    (4, b'ftypqt', '.mov'),
+    (4, b'ftyp', '.mp4'),
+    (0, b'OggS', '.ogg'),
+)
+
+
+def sniff_ext(data):
+    """
+    this function returns the inline extension of a file's bytes, '' when
+    they match none, so the file is only ever sent as a download
+    """
+    head = bytes(data[:64])
+    for offset, signature, ext in SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            if ext == '.webp' and not head.startswith(b'RIFF'):
+                continue
+            return ext
+    if head.startswith(b'\x1a\x45\xdf\xa3') and b'webm' in head:
+        return '.webm'
+    return ''
+
+
+def clean_ext(ext):
+    """
+    this function lowercases a file extension, dropping any that could
+    not be part of a reference
+    """
+    ext = (ext or '').lower()
+    return ext if EXT_PATTERN.match(ext) else ''
+
+
+def inline_type(name):
+    """
+    this function returns the mimetype a file may be displayed as, None
+    if it must only be downloaded
+    """
+    return INLINE_TYPES.get(os.path.splitext(name or '')[1].lower())
+
+
+class FileTooLarge(ValueError):
+    """
+    raised by SnapshotStore.put_stream when a file exceeds its size cap
+    """
+
+
+def store_root(config, instance_path):
+    """
+    this function returns the directory of the snapshot store:
+    snapshot_dir of config.yaml, instance/snapshots by default.
+    """
+    return config.get('snapshot_dir') or os.path.join(instance_path, 'snapshots')
+
+
+class SnapshotStore:
+    """
+    this class keeps alert snapshots and complaint attachments on disk,
+    named by the SHA-256 of their content and sharded into two levels of
+    directories (ab/cd/abcd...jpg). database rows only keep the name,
+    identical files are stored once.
+
+    Args:
+    root: directory of the store, created if missing.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, ref):
+        if not ref or not REF_PATTERN.match(ref):
+            raise ValueError(f"Invalid snapshot reference {ref!r}")
+        return os.path.join(self.root, ref[:2], ref[2:4], ref)
+
+    def exists(self, ref):
+        return os.path.exists(self.path(ref))
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first, readers never see a partial snapshot
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @staticmethod
+    def ref_of(data, ext='.jpg'):
+        return hashlib.sha256(data).hexdigest() + clean_ext(ext)
+
+    def put(self, data, ext='.jpg'):
+        """
+        stores data and returns its reference
+        """
+        ref = self.ref_of(data, ext)
+        path = self.path(ref)
+        if not os.path.exists(path):
+            self._write(path, data)
+        return ref
+
+    def put_stream(self, stream, ext='', max_size=None, chunk_size=1 << 20):
+        """
+        stores a file-like object chunk by chunk, hashing it on the way,
+        and returns its reference. never holds more than one chunk in
+        memory; raises FileTooLarge past max_size bytes.
+        """
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise FileTooLarge(f"File exceeds {max_size} bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+            ref = digest.hexdigest() + clean_ext(ext)
+            path = self.path(ref)
+            if os.path.exists(path):
+                os.remove(tmp)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp, path)
+            return ref
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def thumbnail(self, ref, width=240, quality=70):
+        """
+        returns the path of a JPEG thumbnail of the image ref, built on
+        first use and kept under thumbs/ next to the originals.
+        """
+        stem = os.path.splitext(ref)[0]
+        path = os.path.join(self.root, 'thumbs', str(width), ref[:2], ref[2:4], f"{stem}.jpg")
+        if not os.path.exists(path):
+            image = cv2.imread(self.path(ref))
+            if image is None:
+                raise ValueError(f"Snapshot {ref} is not an image")
+            if image.shape[1] > width:
+                height = round(image.shape[0] * width / image.shape[1])
+                image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+            self._write(path, cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])[1].tobytes())
+        return path
+
+    def read(self, ref):
+        with open(self.path(ref), 'rb') as f:
+            return f.read()
+
+    def delete(self, ref):
+        """
+        removes the file of ref and its thumbnails, callers check that
+        no other row uses it
+        """
+        stem = os.path.splitext(ref)[0]
+        paths = [self.path(ref)]
+        thumbs = os.path.join(self.root, 'thumbs')
+        if os.path.isdir(thumbs):
+            paths += [os.path.join(thumbs, width, ref[:2], ref[2:4], f"{stem}.jpg") for width in os.listdir(thumbs)]
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
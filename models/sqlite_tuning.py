@@ -0,0 +1,42 @@
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# WAL lets readers run alongside the writer, NORMAL sync is safe with WAL and
+# skips an fsync per commit, the cache and mmap sizes keep hot pages in memory
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+
+def apply_pragmas(dbapi_connection, pragmas=None):
+    """
+    this function sets the pragmas on a sqlite3 connection
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in (DEFAULT_PRAGMAS if pragmas is None else pragmas).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_pragmas(pragmas=None):
+    """
+    this function applies DEFAULT_PRAGMAS, updated with pragmas, to every
+    new SQLite connection made by SQLAlchemy.
+    """
+    settings = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+
+    @event.listens_for(Engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            apply_pragmas(dbapi_connection, settings)
+
+    return settings
@@ -0,0 +1,105 @@
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class Stage:
+    """
+    one unit of per-frame work.
+
+    Args:
+    name: key of the stage result.
+    fn: callable run with the results of its dependencies as keyword arguments.
+    deps: names of the stages that must finish first.
+    inline: fn only hands the work off and returns a Future, e.g. from a
+        batch scheduler; it is called on the caller's thread and no pool
+        thread is held while the Future is pending.
+    timeout: seconds to wait for a returned Future, None waits forever.
+    """
+
+    def __init__(self, name, fn, deps=(), inline=False, timeout=None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.inline = inline
+        self.timeout = timeout
+
+
+class StageGraph:
+    """
+    this class runs the detection stages of a frame on a shared thread
+    pool. stages that do not depend on each other run at the same time,
+    so a frame costs about as much as its slowest independent stage.
+
+    Args:
+    max_workers: size of the thread pool shared by all cameras.
+    """
+
+    def __init__(self, max_workers=8):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stage')
+
+    def run(self, stages, observe=None):
+        """
+        runs the given stages and returns a dict of results by stage name.
+        a failing stage is logged and its result is None. observe, if
+        given, is called with (stage name, seconds) after each stage.
+        """
+        pending = {stage.name: stage for stage in stages}
+        results = {}
+        while pending:
+            ready = [stage for stage in pending.values() if all(dep in results for dep in stage.deps)]
+            if not ready:
+                raise ValueError(f"Unresolvable stage dependencies: {sorted(pending)}")
+            # Inline stages are started first, their Futures resolve while the pooled stages run
+            started = {stage.name: self._start(stage, results, observe) for stage in ready if stage.inline}
+            pooled = [stage for stage in ready if not stage.inline]
+            if len(pooled) == 1:
+                # Nothing to overlap with, skip the hand-off to the pool
+                stage = pooled[0]
+                results[stage.name] = self._call(stage, results, observe)
+            elif pooled:
+                futures = {stage.name: self.executor.submit(self._call, stage, results, observe) for stage in pooled}
+                for name, future in futures.items():
+                    results[name] = future.result()
+            for name, value in started.items():
+                results[name] = self._finish(pending[name], value)
+            for stage in ready:
+                del pending[stage.name]
+        return results
+
+    def _call(self, stage, results, observe=None):
+        return self._finish(stage, self._start(stage, results, observe))
+
+    def _start(self, stage, results, observe=None):
+        """
+        calls the stage and returns its value or Future. observe gets the
+        time until the stage's work completed, not until it was collected.
+        """
+        start = time.perf_counter()
+        try:
+            value = stage.fn(**{dep: results[dep] for dep in stage.deps})
+        except Exception as e:
+            logging.error(f"Stage {stage.name} failed: {e}", extra={'throttle': stage.name})
+            value = None
+        if observe is not None:
+            if isinstance(value, Future):
+                value.add_done_callback(lambda _: observe(stage.name, time.perf_counter() - start))
+            else:
+                observe(stage.name, time.perf_counter() - start)
+        return value
+
+    def _finish(self, stage, value):
+        """
+        waits for the stage's Future if it returned one, a failure or a
+        timeout is logged and gives None
+        """
+        if not isinstance(value, Future):
+            return value
+        try:
+            return value.result(stage.timeout)
+        except Exception as e:
+            logging.error(f"Stage {stage.name} failed: {e!r}", extra={'throttle': stage.name})
+            return None
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
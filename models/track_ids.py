@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import yaml
+from ultralytics.trackers.byte_tracker import BYTETracker
+from ultralytics.utils import IterableSimpleNamespace
+from ultralytics.utils.checks import check_yaml
+
+
+class _Detections:
+    """
+    the boxes of one frame as the ultralytics trackers read them: numpy
+    conf, cls, xyxy and xywh, indexable with a boolean mask
+    """
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    @property
+    def xywh(self):
+        return np.concatenate([(self.xyxy[:, :2] + self.xyxy[:, 2:]) / 2, self.xyxy[:, 2:] - self.xyxy[:, :2]], axis=1)
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __getitem__(self, index):
+        return _Detections(self.xyxy[index], self.conf[index], self.cls[index])
+
+
+class TrackIds:
+    """
+    this class keeps one ByteTrack tracker per camera key, configured like
+    model.track(), so a detector shared by every camera, batched or not,
+    numbers each stream on its own. the least recently updated camera is
+    forgotten past max_cameras.
+
+    Args:
+    tracker: ultralytics tracker config, bytetrack.yaml by default.
+    max_cameras: trackers kept before the oldest is dropped.
+    """
+
+    def __init__(self, tracker='bytetrack.yaml', max_cameras=256):
+        with open(check_yaml(tracker)) as f:
+            self.args = IterableSimpleNamespace(**yaml.safe_load(f))
+        self.max_cameras = max_cameras
+        self._trackers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, key, boxes, confidences, classes):
+        """
+        returns the track id of every box of camera key's next frame, in
+        frame coordinates. boxes the tracker has not confirmed yet, and
+        all of them when there is no key to keep the state under, get None.
+        """
+        ids = [None] * len(boxes)
+        if key is None:
+            return ids
+        detections = _Detections(np.asarray(boxes, dtype=np.float32).reshape(-1, 4),
+                                 np.asarray(confidences, dtype=np.float32),
+                                 np.asarray(classes, dtype=np.float32))
+        with self._lock:
+            tracker = self._trackers.pop(key, None)
+            if tracker is None:
+                tracker = BYTETracker(self.args)
+            self._trackers[key] = tracker
+            while len(self._trackers) > self.max_cameras:
+                self._trackers.popitem(last=False)
+            # Rows are [x1, y1, x2, y2, track id, score, class, box index]
+            tracks = tracker.update(detections)
+        for row in tracks:
+            ids[int(row[-1])] = int(row[4])
+        return ids
@@ -0,0 +1,101 @@
+import json
+import math
+import numbers
+
+import cv2
+import numpy as np
+
+
+def _is_sequence(value):
+    return isinstance(value, (list, tuple, np.ndarray))
+
+
+def _is_point(value):
+    return _is_sequence(value) and len(value) == 2 and all(
+        isinstance(v, numbers.Real) and not isinstance(v, (bool, np.bool_))
+        and math.isfinite(v) and abs(v) < 2 ** 31 for v in value)
+
+
+def parse_zones(value):
+    """
+    this function turns the zones stored on a camera into a list of
+    Nx2 int32 polygons. accepts JSON text, a single polygon or a list
+    of polygons; empty input gives no zones, polygons of fewer than
+    three points are dropped and anything else raises ValueError.
+    """
+    if value is None or isinstance(value, bool):
+        return []
+    if isinstance(value, str):
+        if not value.strip():
+            return []
+        value = json.loads(value)
+    if not _is_sequence(value):
+        raise ValueError("Zones must be a list of points or a list of polygons")
+    if len(value) and all(_is_point(point) for point in value):
+        value = [value]
+    polygons = []
+    for polygon in value:
+        if not _is_sequence(polygon) or not all(_is_point(point) for point in polygon):
+            raise ValueError("Each zone must be a list of [x, y] points")
+        points = np.asarray(polygon, dtype=np.int32).reshape(-1, 2)
+        if len(points) >= 3:
+            polygons.append(points)
+    return polygons
+
+
+class ZoneMask:
+    """
+    this class rasterises any number of polygon zones, convex or not,
+    into a label mask once, so that whole arrays of points can then be
+    tested with a single NumPy lookup.
+
+    Args:
+    zones: polygons in any form accepted by parse_zones.
+    shape: shape of the frames the points come from.
+    """
+
+    def __init__(self, zones, shape):
+        self.polygons = parse_zones(zones)
+        self.shape = tuple(shape[:2])
+        # 0 outside every zone, i + 1 inside the i-th zone
+        self.labels = np.zeros(self.shape, dtype=np.uint8)
+        for index, polygon in enumerate(self.polygons[:255]):
+            cv2.fillPoly(self.labels, [polygon], index + 1)
+        self.mask = self.labels > 0
+
+        if self.polygons:
+            points = np.concatenate(self.polygons)
+            x1, y1 = points.min(axis=0)
+            x2, y2 = points.max(axis=0)
+            self.bounds = (int(x1), int(y1), int(x2), int(y2))
+        else:
+            self.bounds = None
+
+    def __bool__(self):
+        return bool(self.polygons)
+
+    def zone_of(self, points):
+        """
+        returns the 1-based zone index of every (x, y) point, 0 if outside
+        """
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        h, w = self.shape
+        xs = np.clip(points[:, 0], 0, w - 1)
+        ys = np.clip(points[:, 1], 0, h - 1)
+        return self.labels[ys, xs]
+
+    def contains(self, points):
+        return self.zone_of(points) > 0
+
+    def boxes_inside(self, boxes, anchor='center'):
+        """
+        returns a bool per xyxy box, tested at its centre or, with
+        anchor='foot', at the middle of its bottom edge.
+        """
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        xs = (boxes[:, 0] + boxes[:, 2]) // 2
+        if anchor == 'foot':
+            ys = boxes[:, 3]
+        else:
+            ys = (boxes[:, 1] + boxes[:, 3]) // 2
+        return self.contains(np.stack([xs, ys], axis=1))
@@ -163,3 +163,158 @@ document.addEventListener("DOMContentLoaded", function () {
     adjustCameraHeight(); // Initial adjustment
     window.addEventListener("resize", adjustCameraHeight);
 });
+
+// Dashboard thumbnails: only the tiles on screen hold a video connection, browsers
+// allow six per host; click a tile to toggle between the thumbnail and full quality
+const BLANK_IMAGE = "data:image/gif;base64,R0lGODlhAQABAAAAACH5BAEKAAEALAAAAAABAAEAAAICTAEAOw==";
+// Height a 16:9 thumbnail takes before its first frame, as reserved in dash.html
+const THUMB_MIN_HEIGHT = "270px";
+
+function feedUrl(img) {
+    return `/video_feed/${img.dataset.camId}?tier=${img.dataset.tier || "thumb"}&overlay=0`;
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+    const overlays = {};
+    document.querySelectorAll(".camera-overlay").forEach(canvas => {
+        overlays[canvas.dataset.camId] = detectionOverlay(canvas, canvas.previousElementSibling);
+    });
+    const detections = detectionStream(overlays);
+
+    const thumbs = document.querySelectorAll(".camera-thumb");
+    const visibility = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            const img = entry.target;
+            img.dataset.visible = entry.isIntersecting ? "true" : "false";
+            detections.show(img.dataset.camId, entry.isIntersecting);
+            if (entry.isIntersecting) {
+                img.src = feedUrl(img);
+                img.style.minHeight = THUMB_MIN_HEIGHT;
+            } else if (img.src !== BLANK_IMAGE) {
+                // Keep the tile's size so the page does not jump while its feed is closed
+                img.style.minHeight = `${img.clientHeight}px`;
+                img.src = BLANK_IMAGE;
+            }
+        });
+    });
+
+    thumbs.forEach(img => {
+        img.style.cursor = "pointer";
+        img.addEventListener("click", function () {
+            const full = img.dataset.tier !== "full";
+            img.dataset.tier = full ? "full" : "thumb";
+            img.width = full ? 1000 : 480;
+            if (img.dataset.visible === "true") {
+                img.src = feedUrl(img);
+            }
+        });
+        visibility.observe(img);
+    });
+});
+
+// Client-side overlays: draw the boxes streamed by /detections over the clean video
+const OVERLAY_COLOURS = {
+    restricted_zone: "#0000ff",
+    fire: "#ff0000",
+    gear: "#00ff00",
+    pose: "#ff0000"
+};
+
+function detectionOverlay(canvas, img) {
+    canvas.style.position = "absolute";
+    canvas.style.left = "0";
+    canvas.style.top = "0";
+    canvas.style.pointerEvents = "none";
+    const ctx = canvas.getContext("2d");
+
+    return {
+        clear: function () {
+            ctx.clearRect(0, 0, canvas.width, canvas.height);
+        },
+        draw: function (event) {
+            canvas.width = img.clientWidth;
+            canvas.height = img.clientHeight;
+            const sx = canvas.width / event.width;
+            const sy = canvas.height / event.height;
+            ctx.clearRect(0, 0, canvas.width, canvas.height);
+            ctx.font = "12px sans-serif";
+            ctx.lineWidth = 2;
+
+            const boxes = event.detections.slice();
+            if (event.alert) {
+                boxes.push(event.alert);
+            }
+            boxes.forEach(detection => {
+                const [x1, y1, x2, y2] = detection.box;
+                const colour = OVERLAY_COLOURS[detection.type] || "#ffffff";
+                ctx.strokeStyle = colour;
+                ctx.fillStyle = colour;
+                ctx.strokeRect(x1 * sx, y1 * sy, (x2 - x1) * sx, (y2 - y1) * sy);
+                let label = detection.label;
+                if (detection.confidence !== undefined) {
+                    label += ` ${Math.round(detection.confidence * 100)}%`;
+                }
+                if (detection.track_id !== null && detection.track_id !== undefined) {
+                    label += ` #${detection.track_id}`;
+                }
+                ctx.fillText(label, x1 * sx, Math.max(y1 * sy - 4, 12));
+            });
+
+            ctx.fillStyle = "#ffffff";
+            ctx.fillText(event.processes.join(" + "), 8, 16);
+        }
+    };
+}
+
+// One event stream carries the detections of the cameras on screen, each event names its
+// camera; it is reopened when tiles scroll in or out, so off-screen cameras can go idle
+function detectionStream(overlays) {
+    const visible = new Set();
+    let source = null;
+    let cams = "";
+    let timer = null;
+
+    function reopen() {
+        const wanted = Array.from(visible).sort().map(encodeURIComponent).join(",");
+        if (wanted === cams) {
+            return;
+        }
+        cams = wanted;
+        if (source) {
+            source.close();
+            source = null;
+        }
+        if (!cams) {
+            return;
+        }
+        source = new EventSource(`/detections?cams=${cams}`);
+        source.onmessage = function (message) {
+            const event = JSON.parse(message.data);
+            const overlay = overlays[event.camera];
+            if (overlay && visible.has(event.camera)) {
+                overlay.draw(event);
+            }
+        };
+        // EventSource reconnects by itself, clear stale boxes meanwhile
+        source.onerror = function () {
+            Object.values(overlays).forEach(overlay => overlay.clear());
+        };
+    }
+
+    return {
+        show: function (camId, shown) {
+            if (!(camId in overlays)) {
+                return;
+            }
+            if (shown) {
+                visible.add(camId);
+            } else {
+                visible.delete(camId);
+                overlays[camId].clear();
+            }
+            // Scrolling changes several tiles at once, reopen the stream once it settles
+            clearTimeout(timer);
+            timer = setTimeout(reopen, 300);
+        }
+    };
+}
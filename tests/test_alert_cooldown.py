@@ -0,0 +1,77 @@
+"""
+Repeated alerts of a (user, camera, type) key are dropped in memory
+during the cooldown, seeded from the latest alerts in the database.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.alert_cooldown import AlertCooldown
+
+T0 = datetime(2024, 5, 1, 12, 0, 0)
+KEY = (1, 'cam-1', 'fire')
+
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+def test_alerts_inside_the_cooldown_are_suppressed():
+    cooldown = AlertCooldown(cooldown=60)
+    assert cooldown.allow(KEY, at(0))
+    assert not cooldown.allow(KEY, at(30))
+    assert not cooldown.allow(KEY, at(60))
+    assert cooldown.allow(KEY, at(61))
+    assert cooldown.stats() == {'keys': 1, 'suppressed': 2}
+
+
+def test_suppressed_alerts_do_not_extend_the_cooldown():
+    cooldown = AlertCooldown(cooldown=60)
+    cooldown.allow(KEY, at(0))
+    cooldown.allow(KEY, at(50))
+    assert cooldown.allow(KEY, at(70))
+
+
+def test_keys_cool_down_independently():
+    cooldown = AlertCooldown(cooldown=60)
+    assert cooldown.allow(KEY, at(0))
+    assert cooldown.allow((1, 'cam-1', 'gear'), at(1))
+    assert cooldown.allow((1, 'cam-2', 'fire'), at(2))
+    assert cooldown.allow((2, 'cam-1', 'fire'), at(3))
+
+
+def test_release_forgets_only_the_same_alert():
+    cooldown = AlertCooldown(cooldown=60)
+    cooldown.allow(KEY, at(0))
+    cooldown.release(KEY, at(5))
+    assert not cooldown.allow(KEY, at(10))
+    cooldown.release(KEY, at(0))
+    assert cooldown.allow(KEY, at(10))
+
+
+def test_seeded_lazily_from_the_latest_alerts():
+    calls = []
+
+    def seed_fn():
+        calls.append(1)
+        return [(KEY, at(0)), (KEY, at(-100)), ((1, 'cam-2', 'fire'), None)]
+
+    cooldown = AlertCooldown(cooldown=60, seed_fn=seed_fn)
+    assert not calls
+    assert not cooldown.allow(KEY, at(30))
+    assert cooldown.allow((1, 'cam-2', 'fire'), at(30))
+    cooldown.seed()
+    assert calls == [1]
+
+
+def test_failed_seed_allows_alerts():
+    def seed_fn():
+        raise RuntimeError('no such table: alert')
+
+    cooldown = AlertCooldown(cooldown=60, seed_fn=seed_fn)
+    cooldown.seed()
+    assert cooldown.allow(KEY, at(0))
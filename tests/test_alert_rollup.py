@@ -0,0 +1,60 @@
+"""
+Hourly and daily alert counts maintained alongside the alert writes.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.alert_rollup import bucket_of, bucket_range, rollup_counts
+
+
+def alert(date_time, alert_type='fire', cam='cam-1', user_id=1):
+    return {'user_id': user_id, 'Cam_id': cam, 'alert_type': alert_type, 'date_time': date_time}
+
+
+def test_bucket_of():
+    date_time = datetime(2024, 5, 1, 13, 45, 12, 999)
+    assert bucket_of(date_time, 'hour') == datetime(2024, 5, 1, 13)
+    assert bucket_of(date_time, 'day') == datetime(2024, 5, 1)
+    with pytest.raises(ValueError):
+        bucket_of(date_time, 'week')
+
+
+def test_rollup_counts_per_hour_and_day():
+    counts = rollup_counts([
+        alert(datetime(2024, 5, 1, 13, 5)),
+        alert(datetime(2024, 5, 1, 13, 55)),
+        alert(datetime(2024, 5, 1, 14, 0)),
+        alert(datetime(2024, 5, 1, 14, 1), alert_type='gear'),
+        alert(datetime(2024, 5, 1, 14, 2), cam=None, user_id=2),
+    ])
+    assert counts == {
+        (1, 'cam-1', 'fire', 'hour', datetime(2024, 5, 1, 13)): 2,
+        (1, 'cam-1', 'fire', 'hour', datetime(2024, 5, 1, 14)): 1,
+        (1, 'cam-1', 'fire', 'day', datetime(2024, 5, 1)): 3,
+        (1, 'cam-1', 'gear', 'hour', datetime(2024, 5, 1, 14)): 1,
+        (1, 'cam-1', 'gear', 'day', datetime(2024, 5, 1)): 1,
+        (2, '', 'fire', 'hour', datetime(2024, 5, 1, 14)): 1,
+        (2, '', 'fire', 'day', datetime(2024, 5, 1)): 1,
+    }
+
+
+def test_rollup_counts_of_no_alerts():
+    assert rollup_counts([]) == {}
+
+
+def test_bucket_range_hours_cross_midnight():
+    assert bucket_range(datetime(2024, 5, 2, 1, 30), 'hour', 3) == [
+        datetime(2024, 5, 1, 23), datetime(2024, 5, 2, 0), datetime(2024, 5, 2, 1)]
+
+
+def test_bucket_range_days_cross_month():
+    assert bucket_range(datetime(2024, 3, 1, 8), 'day', 3) == [
+        datetime(2024, 2, 28), datetime(2024, 2, 29), datetime(2024, 3, 1)]
+    assert bucket_range(datetime(2024, 3, 1, 8), 'day', 1) == [datetime(2024, 3, 1)]
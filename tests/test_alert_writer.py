@@ -0,0 +1,93 @@
+"""
+Alerts are written off the camera loops in batches, and dropped rather
+than blocking once the queue is full.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.alert_writer import AlertWriter
+
+
+class BlockingWrite:
+    """
+    records the batches it is given, holding the first one until
+    released so that the next alerts pile up in the queue
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.started = threading.Event()
+        self.released = threading.Event()
+
+    def __call__(self, alerts):
+        self.started.set()
+        assert self.released.wait(5)
+        self.batches.append(list(alerts))
+
+
+def test_no_thread_before_the_first_alert():
+    writer = AlertWriter(lambda alerts: None)
+    assert writer._thread is None
+    writer.stop()
+
+
+def test_alerts_queued_during_a_commit_go_out_as_one_batch():
+    write = BlockingWrite()
+    writer = AlertWriter(write, max_batch=10, max_wait=0.2)
+    writer.submit('a')
+    assert write.started.wait(5)
+    for alert in 'bcde':
+        assert writer.submit(alert)
+    write.released.set()
+    writer.stop()
+    assert write.batches == [['a'], ['b', 'c', 'd', 'e']]
+    stats = writer.stats()
+    assert (stats['submitted'], stats['written'], stats['batches'], stats['queued']) == (5, 5, 2, 0)
+
+
+def test_batches_are_capped_at_max_batch():
+    write = BlockingWrite()
+    writer = AlertWriter(write, max_batch=2, max_wait=0.2)
+    writer.submit(0)
+    assert write.started.wait(5)
+    for alert in range(1, 6):
+        writer.submit(alert)
+    write.released.set()
+    writer.stop()
+    assert write.batches == [[0], [1, 2], [3, 4], [5]]
+
+
+def test_full_queue_drops_new_alerts():
+    write = BlockingWrite()
+    writer = AlertWriter(write, max_queue=2, max_wait=0.2)
+    writer.submit('a')
+    assert write.started.wait(5)
+    assert [writer.submit(alert) for alert in 'bcd'] == [True, True, False]
+    assert writer.stats()['dropped'] == 1
+    write.released.set()
+    writer.stop()
+    assert [alert for batch in write.batches for alert in batch] == ['a', 'b', 'c']
+
+
+def test_failed_batch_is_counted_and_writing_goes_on():
+    calls = []
+
+    def write(alerts):
+        calls.append(list(alerts))
+        if len(calls) == 1:
+            raise RuntimeError('database is locked')
+
+    writer = AlertWriter(write, max_wait=0.01)
+    writer.submit('a')
+    while not calls:
+        time.sleep(0.01)
+    writer.submit('b')
+    writer.stop()
+    stats = writer.stats()
+    assert (stats['failed'], stats['written']) == (1, 1)
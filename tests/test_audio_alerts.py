@@ -0,0 +1,150 @@
+"""
+Alert sounds play one at a time from a worker thread: waiting requests
+merge, the cooldown drops repeats and the most urgent alert goes first.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.audio_alerts import AudioAlerter
+
+
+class GatedBackend:
+    """
+    records every sound started and holds it until the test lets it finish
+    """
+
+    name = 'gated'
+
+    def __init__(self):
+        self.started = []
+        self.gate = threading.Semaphore(0)
+        self.changed = threading.Condition()
+
+    def play(self, alert):
+        with self.changed:
+            self.started.append(alert)
+            self.changed.notify_all()
+        if not self.gate.acquire(timeout=5):
+            raise RuntimeError('sound never released')
+
+    def wait_started(self, count):
+        with self.changed:
+            assert self.changed.wait_for(lambda: len(self.started) >= count, 5)
+
+    def finish(self, count=1):
+        for _ in range(count):
+            self.gate.release()
+
+
+def wait_until(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def alerters():
+    started = []
+
+    def make(backend, **kwargs):
+        alerter = AudioAlerter(backend, **kwargs)
+        started.append((alerter, backend))
+        return alerter
+    yield make
+    for alerter, backend in started:
+        backend.finish(10)
+        alerter.stop()
+
+
+def test_no_thread_before_the_first_alert():
+    alerter = AudioAlerter(GatedBackend())
+    assert alerter._thread is None
+    alerter.stop()
+
+
+def test_requests_for_a_waiting_alert_are_merged(alerters):
+    backend = GatedBackend()
+    alerter = alerters(backend, repeat=1, cooldown=0)
+    assert alerter.play('fire')
+    backend.wait_started(1)
+    assert alerter.play('pose')
+    assert not alerter.play('pose')
+    assert not alerter.play('pose')
+    backend.finish(2)
+    assert wait_until(lambda: alerter.stats()['played'] == 2)
+    assert backend.started == ['fire', 'pose']
+    assert alerter.stats()['merged'] == 2
+
+
+def test_alert_within_its_cooldown_is_dropped(alerters):
+    backend = GatedBackend()
+    alerter = alerters(backend, repeat=1, cooldown=0.3)
+    alerter.play('fire')
+    backend.wait_started(1)
+    backend.finish()
+    assert not alerter.play('fire')
+    assert alerter.play('pose')
+    assert alerter.stats()['suppressed'] == 1
+    time.sleep(0.35)
+    assert alerter.play('fire')
+
+
+def test_most_urgent_waiting_alert_plays_first(alerters):
+    backend = GatedBackend()
+    alerter = alerters(backend, repeat=1, cooldown=0, priorities={'fire': 0, 'pose': 1})
+    alerter.play('gear')
+    backend.wait_started(1)
+    # Queued in the reverse order of their priority, unknown alerts come last
+    alerter.play('intrusion')
+    alerter.play('pose')
+    alerter.play('fire')
+    backend.finish(4)
+    assert wait_until(lambda: alerter.stats()['played'] == 4)
+    assert backend.started == ['gear', 'fire', 'pose', 'intrusion']
+
+
+def test_more_urgent_alert_cuts_the_repeats_short(alerters):
+    backend = GatedBackend()
+    alerter = alerters(backend, repeat=3, cooldown=0, priorities={'fire': 0, 'pose': 1})
+    alerter.play('pose')
+    backend.wait_started(1)
+    alerter.play('fire')
+    backend.finish(4)
+    assert wait_until(lambda: alerter.stats()['played'] == 2)
+    assert backend.started == ['pose', 'fire', 'fire', 'fire']
+    assert alerter.stats()['interrupted'] == 1
+
+
+def test_less_urgent_alert_waits_for_the_repeats(alerters):
+    backend = GatedBackend()
+    alerter = alerters(backend, repeat=2, cooldown=0, priorities={'fire': 0, 'pose': 1})
+    alerter.play('fire')
+    backend.wait_started(1)
+    alerter.play('pose')
+    backend.finish(4)
+    assert wait_until(lambda: alerter.stats()['played'] == 2)
+    assert backend.started == ['fire', 'fire', 'pose', 'pose']
+
+
+def test_failed_playback_is_counted():
+    class Broken:
+        name = 'broken'
+
+        def play(self, alert):
+            raise OSError('no audio device')
+
+    alerter = AudioAlerter(Broken(), repeat=1)
+    alerter.play('fire')
+    assert wait_until(lambda: alerter.stats()['failed'] == 1)
+    alerter.stop()
@@ -0,0 +1,92 @@
+"""
+Cross-camera batching: items submitted together share one call of the
+batch function and each caller gets its own result back.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+import threading
+from concurrent.futures import TimeoutError
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.batch_scheduler import BatchScheduler
+
+
+@pytest.fixture
+def schedulers():
+    started = []
+
+    def make(batch_fn, **kwargs):
+        scheduler = BatchScheduler(batch_fn, 'test', **kwargs)
+        started.append(scheduler)
+        return scheduler
+    yield make
+    for scheduler in started:
+        scheduler.stop()
+
+
+def test_items_are_batched_and_matched_by_position(schedulers):
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    scheduler = schedulers(double, max_batch=8, max_wait=0.2)
+    futures = [scheduler.submit(i) for i in range(5)]
+    assert [future.result(2) for future in futures] == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+    assert scheduler.stats()['batches'] == 1 and scheduler.stats()['avg_batch'] == 5
+
+
+def test_max_batch_splits_the_queue(schedulers):
+    sizes = []
+
+    def identity(items):
+        sizes.append(len(items))
+        return items
+
+    scheduler = schedulers(identity, max_batch=3, max_wait=0.2)
+    futures = [scheduler.submit(i) for i in range(7)]
+    assert [future.result(2) for future in futures] == list(range(7))
+    assert sizes == [3, 3, 1]
+
+
+def test_short_result_list_fails_the_whole_batch(schedulers):
+    scheduler = schedulers(lambda items: items[:-1], max_wait=0.2)
+    futures = [scheduler.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(2)
+    assert scheduler.stats()['items'] == 0
+
+
+def test_batch_error_reaches_every_caller(schedulers):
+    def fail(items):
+        raise RuntimeError('model crashed')
+
+    scheduler = schedulers(fail, max_wait=0.2)
+    futures = [scheduler.submit(i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match='model crashed'):
+            future.result(2)
+    # The scheduler keeps serving after a failed batch
+    scheduler.batch_fn = lambda items: items
+    assert scheduler(7) == 7
+
+
+def test_call_gives_up_after_timeout(schedulers):
+    release = threading.Event()
+
+    def stuck(items):
+        release.wait(5)
+        return items
+
+    scheduler = schedulers(stuck, timeout=0.2)
+    with pytest.raises(TimeoutError):
+        scheduler('frame')
+    release.set()
@@ -0,0 +1,132 @@
+"""
+Track ids on the batched detection path: frames of several cameras share
+one forward pass, each camera must keep its own stable ids.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models import fire_detection as fire_module
+from models import r_zone as r_zone_module
+
+
+class FakeBox:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = np.array([xyxy], dtype=np.float32)
+        self.conf = np.array([conf], dtype=np.float32)
+        self.cls = np.array([cls], dtype=np.float32)
+
+
+class FakeResult:
+    names = {0: 'person', 1: 'fire'}
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class FakeYOLO:
+    """
+    stands in for ultralytics.YOLO, returning the boxes registered for
+    each frame instead of running a model
+    """
+    scenes = {}
+
+    def __init__(self, path, task=None, verbose=False):
+        self.path = path
+
+    def __call__(self, source, classes=None, verbose=False):
+        frames = source if isinstance(source, list) else [source]
+        results = []
+        for frame in frames:
+            boxes = [FakeBox(*box) for box in self.scenes[id(frame)]]
+            if classes is not None:
+                boxes = [box for box in boxes if int(box.cls[0]) in classes]
+            results.append(FakeResult(boxes))
+        return results
+
+
+@pytest.fixture
+def scene(monkeypatch):
+    monkeypatch.setattr(r_zone_module, 'YOLO', FakeYOLO)
+    monkeypatch.setattr(fire_module, 'YOLO', FakeYOLO)
+    FakeYOLO.scenes = {}
+    frames = []
+
+    def add(boxes):
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        # Keep the frame alive so its id() is not reused by a later one
+        frames.append(frame)
+        FakeYOLO.scenes[id(frame)] = boxes
+        return frame
+    return add
+
+
+def ids_of(result):
+    return [detail['track_id'] for detail in result[2]]
+
+
+def test_people_batch_keeps_ids_per_camera(scene):
+    detector = r_zone_module.people_detection({'people_model': 'people.pt', 'people_confidence': 0.4})
+    first = None
+    for step in range(6):
+        shift = step * 6
+        frame_a = scene([([100 + shift, 100, 160 + shift, 260], 0.9, 0)])
+        frame_b = scene([([300, 50, 360, 200], 0.8, 0), ([20 + shift, 300, 90 + shift, 460], 0.7, 0)])
+        result_a, result_b = detector.process_batch([frame_a, frame_b], [None, None], None,
+                                                    [('u1', 'cam-a'), ('u1', 'cam-b')])
+        ids = (ids_of(result_a), ids_of(result_b))
+        assert None not in ids[0] + ids[1]
+        assert len(set(ids[1])) == 2
+        if first is None:
+            first = ids
+        assert ids == first
+
+
+def test_people_ids_continue_between_batched_and_single_calls(scene):
+    detector = r_zone_module.people_detection({'people_model': 'people.pt'})
+    key = ('u1', 'cam-a')
+    frame = scene([([100, 100, 160, 260], 0.9, 0)])
+    batched = detector.process_batch([frame], [None], None, [key])[0]
+    frame = scene([([104, 102, 164, 262], 0.9, 0)])
+    single = detector.process(frame, region=None, key=key)
+    assert ids_of(batched) == ids_of(single) != [None]
+
+
+def test_fire_batch_keeps_ids_per_camera(scene):
+    detector = fire_module.fire_detection({'fire_model': 'fire.pt', 'fire_confidence': 0.5})
+    keys = [('u1', 'cam-a'), ('u2', 'cam-a')]
+    previous = None
+    for step in range(4):
+        frames = [scene([([200 + step, 200, 260 + step, 280], 0.9, 1)]),
+                  scene([([200 + step, 200, 260 + step, 280], 0.9, 1)])]
+        ids = [ids_of(result) for result in detector.process_batch(frames, None, keys)]
+        assert None not in ids[0] + ids[1]
+        if previous is not None:
+            assert ids == previous
+        previous = ids
+
+
+def test_new_object_gets_new_id_once_confirmed(scene):
+    detector = fire_module.fire_detection({'fire_model': 'fire.pt', 'fire_confidence': 0.5})
+    key = ('u1', 'cam-a')
+    (first,) = ids_of(detector.process_batch([scene([([10, 10, 50, 50], 0.9, 1)])], None, [key])[0])
+    # ByteTrack confirms a track that appears after the first frame on its second match
+    ids = ids_of(detector.process_batch([scene([([12, 10, 52, 50], 0.9, 1), ([400, 300, 480, 400], 0.9, 1)])],
+                                        None, [key])[0])
+    assert ids == [first, None]
+    ids = ids_of(detector.process_batch([scene([([14, 10, 54, 50], 0.9, 1), ([402, 300, 482, 400], 0.9, 1)])],
+                                        None, [key])[0])
+    assert ids[0] == first
+    assert ids[1] not in (None, first)
+
+
+def test_batch_without_keys_has_no_ids(scene):
+    detector = fire_module.fire_detection({'fire_model': 'fire.pt', 'fire_confidence': 0.5})
+    result = detector.process_batch([scene([([10, 10, 50, 50], 0.9, 1)])])[0]
+    assert result[0] and ids_of(result) == [None]
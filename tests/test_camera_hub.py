@@ -0,0 +1,113 @@
+"""
+One capture-and-detect worker per camera, shared by its viewers and
+stopped once they have all left.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.camera_hub import CameraHub
+
+
+class Source:
+    """
+    counts how many workers were started on it and yields numbered
+    frames until closed
+    """
+
+    def __init__(self, label=None, interval=0.01):
+        self.label = label
+        self.interval = interval
+        self.started = 0
+        self.closed = 0
+
+    def __call__(self):
+        self.started += 1
+        return self._frames()
+
+    def _frames(self):
+        try:
+            n = 0
+            while True:
+                n += 1
+                yield (self.label, n) if self.label else n
+                time.sleep(self.interval)
+        finally:
+            self.closed += 1
+
+
+def wait_until(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def hub():
+    hub = CameraHub(idle_timeout=0.1)
+    yield hub
+    hub.stop_all()
+
+
+def test_viewers_of_one_camera_share_a_worker(hub):
+    source = Source()
+    first = hub.subscribe(('u1', 'cam'), source)
+    second = hub.subscribe(('u1', 'cam'), source)
+    assert next(first) >= 1 and next(second) >= 1
+    assert source.started == 1
+    assert hub.stats() == {('u1', 'cam'): 2}
+
+
+def test_worker_stops_once_idle_and_restarts_for_a_new_viewer(hub):
+    source = Source()
+    viewer = hub.subscribe(('u1', 'cam'), source)
+    next(viewer)
+    viewer.close()
+    assert hub.stats() == {('u1', 'cam'): 0}
+    assert wait_until(lambda: source.closed == 1)
+    assert wait_until(lambda: hub.stats() == {})
+
+    viewer = hub.subscribe(('u1', 'cam'), source)
+    next(viewer)
+    assert source.started == 2
+    viewer.close()
+
+
+def test_worker_keeps_running_while_watched(hub):
+    source = Source()
+    viewer = hub.subscribe(('u1', 'cam'), source)
+    for _ in range(30):
+        next(viewer)
+    assert source.closed == 0 and source.started == 1
+    viewer.close()
+
+
+def test_stop_ends_the_viewers(hub):
+    source = Source()
+    viewer = hub.subscribe(('u1', 'cam'), source)
+    next(viewer)
+    hub.stop(('u1', 'cam'))
+    # The viewer drains at most the last payload, then ends
+    assert len(list(viewer)) <= 1
+    assert source.closed == 1
+
+
+def test_subscribe_many_merges_the_cameras(hub):
+    sources = {'a': Source('a'), 'b': Source('b')}
+    merged = hub.subscribe_many([(('u1', name), source) for name, source in sources.items()])
+    seen = set()
+    for _ in range(20):
+        seen.add(next(merged)[0])
+    merged.close()
+    assert all(source.started == 1 for source in sources.values())
+    assert hub.stats() == {('u1', 'a'): 0, ('u1', 'b'): 0}
+    assert seen == {'a', 'b'}
@@ -0,0 +1,96 @@
+"""
+The frame grabber hands out the newest frame and counts the ones a slow
+consumer skipped.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.frame_grabber import FrameGrabber
+
+
+class FakeCapture:
+    """
+    stands in for cv2.VideoCapture, giving out the numbers 1..frames
+    as frames, each one only once a test has released it
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.read_count = 0
+        self.gate = threading.Semaphore(0)
+        self.props = {}
+
+    def set(self, prop, value):
+        self.props[prop] = value
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.read_count >= self.frames or not self.gate.acquire(timeout=5):
+            return False, None
+        self.read_count += 1
+        return True, self.read_count
+
+
+def release(cap, count=1):
+    for _ in range(count):
+        cap.gate.release()
+
+
+def wait_captured(grabber, count):
+    with grabber._cond:
+        assert grabber._cond.wait_for(lambda: grabber.captured >= count, 5)
+
+
+def test_consumer_in_step_drops_nothing():
+    cap = FakeCapture(3)
+    grabber = FrameGrabber(cap, 'cam').start()
+    for expected in (1, 2, 3):
+        release(cap)
+        packet, skipped = grabber.read()
+        assert (packet.seq, packet.frame, skipped) == (expected, expected, 0)
+    assert grabber.read() == (None, 0)
+    assert grabber.stats() == {'captured': 3, 'consumed': 3, 'dropped': 0, 'buffered': 2}
+
+
+def test_slow_consumer_gets_the_newest_frame_and_the_drop_count():
+    cap = FakeCapture(10)
+    grabber = FrameGrabber(cap, 'cam', buffer_size=2).start()
+    release(cap)
+    assert grabber.read()[0].frame == 1
+    release(cap, 5)
+    wait_captured(grabber, 6)
+    packet, skipped = grabber.read()
+    assert (packet.frame, skipped) == (6, 4)
+    release(cap)
+    packet, skipped = grabber.read()
+    assert (packet.frame, skipped) == (7, 0)
+    release(cap, 3)
+    grabber.stop()
+    stats = grabber.stats()
+    assert (stats['consumed'], stats['dropped']) == (3, 4)
+
+
+def test_read_times_out_without_a_new_frame():
+    cap = FakeCapture(5)
+    grabber = FrameGrabber(cap, 'cam').start()
+    release(cap)
+    assert grabber.read()[0].frame == 1
+    # The same frame is never handed out twice
+    assert grabber.read(timeout=0.1) == (None, 0)
+    release(cap, 4)
+    grabber.stop()
+
+
+def test_capture_buffer_is_shortened():
+    import cv2
+
+    cap = FakeCapture(0)
+    FrameGrabber(cap, 'cam')
+    assert cap.props == {cv2.CAP_PROP_BUFFERSIZE: 1}
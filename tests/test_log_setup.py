@@ -0,0 +1,87 @@
+"""
+Records logged with a throttle key are rate limited per call site and
+key, the next one let through reports how many were suppressed.
+
+Usage: python -m pytest tests
+"""
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models import log_setup
+from models.log_setup import RateLimitFilter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(log_setup.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def record(throttle=None, lineno=10, msg='Camera 1 read failed'):
+    record = logging.LogRecord('root', logging.ERROR, 'app.py', lineno, msg, None, None)
+    if throttle is not None:
+        record.throttle = throttle
+    return record
+
+
+def test_records_without_a_key_always_pass(clock):
+    throttle = RateLimitFilter(rate=1, burst=1)
+    assert all(throttle.filter(record()) for _ in range(20))
+
+
+def test_burst_then_rate(clock):
+    throttle = RateLimitFilter(rate=2, burst=3)
+    assert [throttle.filter(record('cam-1')) for _ in range(5)] == [True, True, True, False, False]
+    clock[0] += 0.5
+    assert [throttle.filter(record('cam-1')) for _ in range(2)] == [True, False]
+    assert throttle.suppressed == 3
+
+
+def test_next_record_reports_the_suppressed_count(clock):
+    throttle = RateLimitFilter(rate=1, burst=1)
+    throttle.filter(record('cam-1'))
+    for _ in range(4):
+        throttle.filter(record('cam-1'))
+    clock[0] += 1
+    passed = record('cam-1')
+    assert throttle.filter(passed)
+    assert passed.getMessage() == 'Camera 1 read failed (4 similar messages suppressed)'
+    clock[0] += 1
+    passed = record('cam-1')
+    assert throttle.filter(passed)
+    assert passed.getMessage() == 'Camera 1 read failed'
+
+
+def test_keys_and_call_sites_are_limited_separately(clock):
+    throttle = RateLimitFilter(rate=1, burst=1)
+    assert throttle.filter(record('cam-1'))
+    assert not throttle.filter(record('cam-1'))
+    assert throttle.filter(record('cam-2'))
+    assert throttle.filter(record('cam-1', lineno=20))
+
+
+def test_tokens_do_not_pile_up_past_the_burst(clock):
+    throttle = RateLimitFilter(rate=1, burst=2)
+    throttle.filter(record('cam-1'))
+    clock[0] += 3600
+    assert [throttle.filter(record('cam-1')) for _ in range(3)] == [True, True, False]
+
+
+def test_logger_with_the_filter(clock, caplog):
+    logger = logging.getLogger('indshield-test')
+    throttle = RateLimitFilter(rate=1, burst=2)
+    logger.addFilter(throttle)
+    try:
+        with caplog.at_level(logging.ERROR, logger='indshield-test'):
+            for _ in range(5):
+                logger.error("Frame decode failed", extra={'throttle': 'cam-1'})
+            logger.error("Database unreachable")
+    finally:
+        logger.removeFilter(throttle)
+    assert [r.getMessage() for r in caplog.records] == ["Frame decode failed"] * 2 + ["Database unreachable"]
@@ -0,0 +1,147 @@
+"""
+Latency histograms, per-camera counters and their Prometheus and JSON
+renderings.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.metrics import Histogram, Metrics
+
+CAM = (1, 'cam-1')
+
+
+def samples(text):
+    """
+    maps every sample line of a Prometheus text exposition to its value
+    """
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            result[name] = float(value)
+    return result
+
+
+def test_histogram_buckets_are_inclusive_upper_bounds():
+    histogram = Histogram((0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert (histogram.count, histogram.max) == (5, 3.0)
+    assert histogram.sum == pytest.approx(3.565)
+
+
+def test_histogram_quantiles_interpolate_inside_the_bucket():
+    histogram = Histogram((0.01, 0.02, 0.04))
+    for _ in range(50):
+        histogram.observe(0.005)
+    for _ in range(50):
+        histogram.observe(0.03)
+    assert histogram.quantile(0.25) == pytest.approx(0.005)
+    assert histogram.quantile(0.5) == pytest.approx(0.01)
+    # Never above the largest value seen
+    assert histogram.quantile(0.99) == pytest.approx(0.03)
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_histogram_summary_and_copy():
+    histogram = Histogram()
+    histogram.observe(0.002)
+    histogram.observe(0.004)
+    copy = histogram.copy()
+    histogram.observe(1.0)
+    assert copy.count == 2 and copy.counts != histogram.counts
+    summary = copy.summary()
+    assert (summary['count'], summary['avg_ms'], summary['max_ms']) == (2, 3.0, 4.0)
+
+
+def test_cameras_are_reported_between_start_and_remove():
+    metrics = Metrics()
+    metrics.observe('detect', 0.01, CAM)
+    metrics.frame(CAM)
+    assert metrics.summary()['cameras'] == {}
+
+    handle = metrics.start(CAM)
+    metrics.observe('detect', 0.01, CAM)
+    metrics.frame(CAM, dropped=3)
+    camera = metrics.summary()['cameras']['1/cam-1']
+    assert (camera['frames'], camera['dropped'], camera['stages']['detect']['count']) == (1, 3, 1)
+
+    # A newer worker of the same camera is not removed by the old one's handle
+    newer = metrics.start(CAM)
+    metrics.remove(CAM, handle)
+    assert '1/cam-1' in metrics.summary()['cameras']
+    metrics.remove(CAM, newer)
+    assert metrics.summary()['cameras'] == {}
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.start(CAM)
+    with metrics.timer('detect', CAM):
+        pass
+    metrics.frame(CAM)
+    metrics.observe('db', 0.1)
+    summary = metrics.summary()
+    assert summary['cameras']['1/cam-1']['frames'] == 0
+    assert summary['stages'] == {}
+
+
+def test_user_scope_hides_other_users_and_global_components():
+    metrics = Metrics()
+    metrics.start((1, 'a'))
+    metrics.start((2, 'b'))
+    metrics.observe('db', 0.1)
+    metrics.watch('alert_writer', lambda: {'queued': 4})
+    metrics.watch('grabber', lambda: {'dropped': 2}, camera=(1, 'a'))
+    summary = metrics.summary(user_id=1)
+    assert list(summary['cameras']) == ['1/a']
+    assert summary['cameras']['1/a']['grabber'] == {'dropped': 2}
+    assert summary['stages'] == {} and summary['components'] == {}
+    assert 'alert_writer_queued' not in metrics.prometheus(user_id=1)
+    assert metrics.summary()['components'] == {'alert_writer': {'queued': 4}}
+
+
+def test_failing_collector_is_skipped():
+    metrics = Metrics()
+    metrics.watch('broken', lambda: 1 / 0)
+    metrics.watch('pool', lambda: {'workers': 2})
+    assert metrics.summary()['components'] == {'pool': {'workers': 2}}
+
+
+def test_prometheus_rendering():
+    metrics = Metrics(buckets=(0.01, 0.1))
+    metrics.start((1, 'gate "A"'))
+    metrics.observe('detect', 0.005, (1, 'gate "A"'))
+    metrics.observe('detect', 0.05, (1, 'gate "A"'))
+    metrics.frame((1, 'gate "A"'), dropped=2)
+    metrics.observe('db', 0.2)
+    metrics.watch('batch scheduler', lambda: {'fire': {'batches': 3, 'name': 'x'}, 'workers': 1, 'label': 'text'})
+    text = metrics.prometheus()
+
+    labels = 'user="1",camera="gate \\"A\\"",stage="detect"'
+    values = samples(text)
+    assert values[f'indshield_stage_seconds_bucket{{{labels},le="0.01"}}'] == 1
+    assert values[f'indshield_stage_seconds_bucket{{{labels},le="0.1"}}'] == 2
+    assert values[f'indshield_stage_seconds_bucket{{{labels},le="+Inf"}}'] == 2
+    assert values[f'indshield_stage_seconds_count{{{labels}}}'] == 2
+    assert values[f'indshield_stage_seconds_sum{{{labels}}}'] == pytest.approx(0.055)
+    assert values['indshield_stage_seconds_bucket{stage="db",le="+Inf"}'] == 1
+    assert values['indshield_dropped_frames_total{user="1",camera="gate \\"A\\""}'] == 2
+    # Nested stats are labelled with their key, text values are left out
+    assert values['indshield_batch_scheduler_batches{name="fire"}'] == 3
+    assert values['indshield_batch_scheduler_workers'] == 1
+    assert 'label' not in text and 'scheduler_name' not in text
+
+    # One TYPE line per family, before its samples
+    types = [line for line in text.splitlines() if line.startswith('# TYPE')]
+    assert len(types) == len(set(types))
+    assert '# TYPE indshield_stage_seconds histogram' in types
+    assert '# TYPE indshield_frames_total counter' in types
+    assert text.endswith('\n')
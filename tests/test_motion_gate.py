@@ -0,0 +1,80 @@
+"""
+The motion gate skips the detectors on frames that match the last
+inferred one and forces a check every max_interval seconds.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models import motion_gate as motion_gate_module
+from models.motion_gate import MotionGate
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(motion_gate_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def frame(rect=None, level=200):
+    """
+    a black 640x360 frame, with rect (x1, y1, x2, y2) painted at level
+    """
+    image = np.zeros((360, 640, 3), dtype=np.uint8)
+    if rect:
+        x1, y1, x2, y2 = rect
+        image[y1:y2, x1:x2] = level
+    return image
+
+
+def test_first_frame_runs_then_static_frames_are_skipped(clock):
+    gate = MotionGate()
+    assert gate.should_run(frame())
+    assert not gate.should_run(frame())
+    assert not gate.should_run(frame())
+    assert gate.stats() == {'checked': 1, 'skipped': 2, 'skip_ratio': 0.6667}
+
+
+def test_moving_object_runs(clock):
+    gate = MotionGate()
+    gate.should_run(frame((0, 0, 80, 80)))
+    assert gate.should_run(frame((200, 100, 280, 180)))
+
+
+def test_change_below_sensitivity_is_skipped(clock):
+    gate = MotionGate(sensitivity=0.05)
+    gate.should_run(frame())
+    # About 1% of the frame changes
+    assert not gate.should_run(frame((0, 0, 64, 36)))
+    assert gate.should_run(frame((0, 0, 320, 180)))
+
+
+def test_small_grey_changes_are_ignored(clock):
+    gate = MotionGate(pixel_threshold=25)
+    gate.should_run(frame())
+    assert not gate.should_run(frame((0, 0, 640, 360), level=10))
+
+
+def test_slow_drift_is_compared_with_the_last_inferred_frame(clock):
+    gate = MotionGate()
+    gate.should_run(frame())
+    # Every step is under the pixel threshold, their sum is not
+    results = [gate.should_run(frame((0, 0, 640, 360), level=level)) for level in (15, 30, 45)]
+    assert results == [False, True, False]
+
+
+def test_recheck_is_forced_after_max_interval(clock):
+    gate = MotionGate(max_interval=5.0)
+    gate.should_run(frame())
+    clock[0] += 4.9
+    assert not gate.should_run(frame())
+    clock[0] += 0.1
+    assert gate.should_run(frame())
+    assert not gate.should_run(frame())
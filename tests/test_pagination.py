@@ -0,0 +1,32 @@
+"""
+Keyset pagination cursors of the notifications page.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.pagination import make_cursor, parse_cursor
+
+
+@pytest.mark.parametrize('date_time', [datetime(2024, 5, 1, 12, 30, 5), datetime(2024, 5, 1, 12, 30, 5, 123456)])
+def test_cursor_round_trip(date_time):
+    cursor = make_cursor(date_time, 42)
+    assert parse_cursor(cursor) == (date_time, 42)
+
+
+def test_parse_cursor():
+    assert parse_cursor('2024-05-01T12:30:05_7') == (datetime(2024, 5, 1, 12, 30, 5), 7)
+    assert parse_cursor('2024-05-01 12:30:05.500000_7') == (datetime(2024, 5, 1, 12, 30, 5, 500000), 7)
+
+
+@pytest.mark.parametrize('value', [None, '', '_', '42', '2024-05-01T12:30:05', '2024-05-01T12:30:05_',
+                                   '2024-05-01T12:30:05_x', 'yesterday_7', '2024-13-01T00:00:00_7',
+                                   '2024-05-01T12:30:05_7.5'])
+def test_invalid_cursor_is_ignored(value):
+    assert parse_cursor(value) is None
@@ -0,0 +1,135 @@
+"""
+Alert SMS leave from a background thread, coalesced per alert type,
+rate limited per recipient and retried with backoff.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.sms_dispatcher import LocalBackend, SmsDispatcher
+
+
+class FlakyBackend(LocalBackend):
+    """
+    a local backend whose first failures sends raise, recording when
+    every attempt was made
+    """
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.attempts = []
+
+    def send(self, to, body):
+        self.attempts.append(time.monotonic())
+        if len(self.attempts) <= self.failures:
+            raise ConnectionError('Twilio unreachable')
+        return super().send(to, body)
+
+
+def wait_until(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def messages(backend):
+    return [(record['to'], record['body']) for record in backend.sent]
+
+
+@pytest.fixture
+def dispatchers():
+    started = []
+
+    def make(backend, recipients=('+1',), **kwargs):
+        dispatcher = SmsDispatcher(backend, list(recipients), **kwargs)
+        started.append(dispatcher)
+        return dispatcher
+    yield make
+    for dispatcher in started:
+        dispatcher.stop()
+
+
+def test_no_thread_before_the_first_alert():
+    dispatcher = SmsDispatcher(LocalBackend(), ['+1'])
+    assert dispatcher._thread is None
+    dispatcher.stop()
+
+
+def test_alerts_within_the_window_become_one_follow_up(dispatchers):
+    backend = LocalBackend()
+    dispatcher = dispatchers(backend, recipients=['+1', '+2', ''], window=0.3, rate_limit=0)
+    dispatcher.notify('fire', 'Fire detected!')
+    assert wait_until(lambda: len(backend.sent) == 2)
+    for _ in range(3):
+        dispatcher.notify('fire', 'Fire detected!')
+    time.sleep(0.1)
+    assert len(backend.sent) == 2
+    assert wait_until(lambda: len(backend.sent) == 4)
+    assert messages(backend)[2:] == [('+1', 'Fire detected! (3 alerts)'), ('+2', 'Fire detected! (3 alerts)')]
+    stats = dispatcher.stats()
+    assert (stats['recipients'], stats['notified'], stats['sent'], stats['coalesced']) == (2, 4, 4, 4)
+
+
+def test_recipient_gets_one_message_per_rate_limit(dispatchers):
+    backend = LocalBackend()
+    dispatcher = dispatchers(backend, window=0, rate_limit=0.4)
+    start = time.monotonic()
+    dispatcher.notify('fire', 'Fire')
+    dispatcher.notify('pose', 'Fall')
+    assert wait_until(lambda: len(backend.sent) == 2)
+    assert messages(backend) == [('+1', 'Fire'), ('+1', 'Fall')]
+    assert backend.sent[1]['time'] - backend.sent[0]['time'] >= 0.35
+    assert time.monotonic() - start >= 0.35
+
+
+def test_failed_send_is_retried_with_backoff(dispatchers):
+    backend = FlakyBackend(failures=2)
+    dispatcher = dispatchers(backend, backoff=0.1, max_retries=3)
+    dispatcher.notify('fire', 'Fire')
+    assert wait_until(lambda: backend.sent)
+    first, second, third = backend.attempts
+    assert second - first >= 0.09
+    assert third - second >= 0.19
+    stats = dispatcher.stats()
+    assert (stats['sent'], stats['retried'], stats['failed']) == (1, 2, 0)
+
+
+def test_alerts_during_a_retry_join_it(dispatchers):
+    backend = FlakyBackend(failures=1)
+    dispatcher = dispatchers(backend, backoff=0.3)
+    dispatcher.notify('fire', 'Fire')
+    assert wait_until(lambda: backend.attempts)
+    dispatcher.notify('fire', 'Fire')
+    assert wait_until(lambda: backend.sent)
+    assert messages(backend) == [('+1', 'Fire (2 alerts)')]
+
+
+def test_sending_gives_up_after_max_retries(dispatchers):
+    backend = FlakyBackend(failures=10)
+    dispatcher = dispatchers(backend, backoff=0.01, max_retries=2)
+    dispatcher.notify('fire', 'Fire')
+    assert wait_until(lambda: dispatcher.stats()['failed'] == 1)
+    assert len(backend.attempts) == 3
+    assert dispatcher.stats()['pending'] == 0
+
+
+def test_stop_sends_what_is_still_waiting():
+    backend = LocalBackend()
+    dispatcher = SmsDispatcher(backend, ['+1'], window=30, rate_limit=300)
+    dispatcher.notify('fire', 'Fire')
+    assert wait_until(lambda: backend.sent)
+    dispatcher.notify('fire', 'Fire')
+    dispatcher.notify('pose', 'Fall')
+    dispatcher.stop()
+    assert sorted(messages(backend)) == [('+1', 'Fall'), ('+1', 'Fire'), ('+1', 'Fire')]
+    assert dispatcher.stats()['pending'] == 0
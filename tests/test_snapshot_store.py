@@ -0,0 +1,134 @@
+"""
+Content-addressed snapshot and attachment store, streamed uploads and
+ranged downloads of its files.
+
+Usage: python -m pytest tests
+"""
+import hashlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.snapshot_store import FileTooLarge, SnapshotStore, inline_type, sniff_ext
+
+
+class ChunkCounter(io.BytesIO):
+    """
+    a file-like object recording the size of every read
+    """
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = []
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.reads.append(len(chunk))
+        return chunk
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / 'snapshots'))
+
+
+def stored_files(store):
+    return sorted(name for _, _, names in os.walk(store.root) for name in names)
+
+
+def test_put_is_content_addressed_and_deduplicated(store):
+    ref = store.put(b'frame', '.JPG')
+    assert ref == hashlib.sha256(b'frame').hexdigest() + '.jpg'
+    assert store.put(b'frame', '.jpg') == ref
+    assert store.path(ref).endswith(os.path.join(ref[:2], ref[2:4], ref))
+    assert store.read(ref) == b'frame'
+    assert stored_files(store) == [ref]
+
+
+@pytest.mark.parametrize('ref', ['', '../../etc/passwd', 'abc.jpg', 'A' * 64, '0' * 64 + '.j/g'])
+def test_invalid_references_are_refused(store, ref):
+    with pytest.raises(ValueError):
+        store.path(ref)
+
+
+def test_put_stream_matches_put_and_reads_in_chunks(store):
+    data = os.urandom(10_000)
+    stream = ChunkCounter(data)
+    ref = store.put_stream(stream, '.mp4', chunk_size=4096)
+    assert ref == store.ref_of(data, '.mp4')
+    assert stream.reads == [4096, 4096, 1808, 0]
+    assert store.read(ref) == data
+    # The same upload again leaves a single copy
+    assert store.put_stream(io.BytesIO(data), '.mp4') == ref
+    assert stored_files(store) == [ref]
+
+
+def test_put_stream_too_large_keeps_nothing(store):
+    with pytest.raises(FileTooLarge):
+        store.put_stream(io.BytesIO(b'x' * 5000), '.pdf', max_size=4999, chunk_size=1024)
+    assert stored_files(store) == []
+    assert store.put_stream(io.BytesIO(b'x' * 5000), '.pdf', max_size=5000, chunk_size=1024)
+
+
+def test_delete_removes_the_file_and_its_thumbnails(store):
+    cv2 = pytest.importorskip('cv2')
+    import numpy as np
+
+    ref = store.put(cv2.imencode('.png', np.full((60, 480, 3), 128, dtype=np.uint8))[1].tobytes(), '.png')
+    thumb = store.thumbnail(ref, width=240)
+    assert cv2.imread(thumb).shape == (30, 240, 3)
+    store.delete(ref)
+    assert stored_files(store) == []
+    store.delete(ref)
+
+
+@pytest.mark.parametrize('data, ext', [
+    (b'\xff\xd8\xff\xe0' + b'\0' * 16, '.jpg'),
+    (b'\x89PNG\r\n\x1a\n' + b'\0' * 8, '.png'),
+    (b'RIFF\0\0\0\0WEBPVP8 ', '.webp'),
+    (b'RIFF\0\0\0\0WAVEfmt ', ''),
+    (b'\0\0\0\x14ftypqt  ', '.mov'),
+    (b'\0\0\0\x18ftypisom', '.mp4'),
+    (b'\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01webm', '.webm'),
+    (b'%PDF-1.7', '.pdf'),
+    (b'<html><script>', ''),
+    (b'', ''),
+])
+def test_sniff_ext(data, ext):
+    assert sniff_ext(data) == ext
+
+
+def test_only_allowlisted_types_are_inline():
+    assert inline_type('report.PDF') == 'application/pdf'
+    assert inline_type('clip.mp4') == 'video/mp4'
+    assert inline_type('page.html') is None
+    assert inline_type('image.svg') is None
+    assert inline_type(None) is None
+
+
+def test_stored_files_are_served_by_range(store):
+    flask = pytest.importorskip('flask')
+
+    data = bytes(range(256)) * 40
+    ref = store.put(data, '.mp4')
+    app = flask.Flask(__name__)
+
+    @app.route('/file/<ref>')
+    def serve(ref):
+        # The same call as send_stored in app.py
+        return flask.send_file(store.path(ref), mimetype=inline_type(ref), conditional=True,
+                               download_name=ref, max_age=31536000)
+
+    client = app.test_client()
+    response = client.get(f'/file/{ref}', headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(data)}'
+    assert response.data == data[100:200]
+    assert client.get(f'/file/{ref}', headers={'Range': f'bytes={len(data)}-'}).status_code == 416
+
+    etag = client.get(f'/file/{ref}').headers['ETag']
+    assert client.get(f'/file/{ref}', headers={'If-None-Match': etag}).status_code == 304
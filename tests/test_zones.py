@@ -0,0 +1,72 @@
+"""
+Zone parsing and the rasterised zone mask.
+
+Usage: python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.zones import ZoneMask, parse_zones
+
+SQUARE = [[10, 10], [50, 10], [50, 50], [10, 50]]
+
+
+@pytest.mark.parametrize('value', [None, '', '   ', [], '[]', True])
+def test_empty_input_gives_no_zones(value):
+    assert parse_zones(value) == []
+
+
+def test_single_polygon_and_json_text():
+    (polygon,) = parse_zones(SQUARE)
+    assert polygon.dtype == np.int32 and polygon.shape == (4, 2)
+    (from_json,) = parse_zones('[[10, 10], [50, 10], [50, 50], [10, 50]]')
+    assert np.array_equal(polygon, from_json)
+
+
+def test_list_of_polygons_drops_degenerate_ones():
+    polygons = parse_zones([SQUARE, [[0, 0], [5, 5]], [[60, 60], [90, 60], [75, 90]]])
+    assert [len(polygon) for polygon in polygons] == [4, 3]
+
+
+@pytest.mark.parametrize('value', ['{"x": 1}', '[[1, 2, 3]]', [[[1, 'a'], [2, 2], [3, 3]]],
+                                   [[[1, float('nan')], [2, 2], [3, 3]]], [[True, 1], [2, 2], [3, 3]], 42])
+def test_malformed_zones_raise(value):
+    with pytest.raises(ValueError):
+        parse_zones(value)
+
+
+def test_zone_of_labels_each_polygon():
+    mask = ZoneMask([SQUARE, [[100, 100], [150, 100], [150, 150], [100, 150]]], (200, 300, 3))
+    assert mask and mask.shape == (200, 300)
+    assert mask.zone_of([[30, 30], [120, 120], [5, 5]]).tolist() == [1, 2, 0]
+    assert mask.bounds == (10, 10, 150, 150)
+
+
+def test_concave_zone():
+    # An L shape: the notch at the top right is outside
+    mask = ZoneMask([[0, 0], [40, 0], [40, 20], [20, 20], [20, 40], [0, 40]], (50, 50))
+    assert mask.contains([[10, 10], [10, 30], [30, 10], [30, 30]]).tolist() == [True, True, True, False]
+
+
+def test_points_outside_the_frame_are_clipped():
+    mask = ZoneMask(SQUARE, (100, 100))
+    assert mask.contains([[-5, -5], [1000, 1000]]).tolist() == [False, False]
+
+
+def test_boxes_inside_by_center_or_foot():
+    mask = ZoneMask([[0, 60], [100, 60], [100, 100], [0, 100]], (100, 100))
+    # Standing with the feet in the zone, centre above it
+    boxes = [[40, 20, 60, 80], [40, 0, 60, 30]]
+    assert mask.boxes_inside(boxes).tolist() == [False, False]
+    assert mask.boxes_inside(boxes, anchor='foot').tolist() == [True, False]
+
+
+def test_no_zones():
+    mask = ZoneMask(None, (10, 10))
+    assert not mask and mask.bounds is None
+    assert not mask.contains([[5, 5]]).any()